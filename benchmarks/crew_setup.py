@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Per-request crew setup cost: DescopeAgenticCrew per call vs. CrewFactory.build.
+
+    uv run python benchmarks/crew_setup.py [--iterations 50]
+
+Only construction is measured; nothing is kicked off, so no API keys or
+network access are needed.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "descope_agentic_crew"))
+
+from crew import CrewFactory, DescopeAgenticCrew  # noqa: E402
+
+
+def _measure(label, make, iterations):
+    make()  # warm imports and lazy module state
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        make()
+    elapsed = time.perf_counter() - started
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(s.size_diff for s in after.compare_to(before, "filename") if s.size_diff > 0)
+    blocks = sum(s.count_diff for s in after.compare_to(before, "filename") if s.count_diff > 0)
+    print(f"{label:<28} {elapsed / iterations * 1000:8.2f} ms/request  "
+          f"{allocated / iterations / 1024:8.1f} KiB retained/request  "
+          f"{blocks / iterations:8.0f} blocks/request  peak {peak / 1024:8.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    _measure(
+        "DescopeAgenticCrew().crew()",
+        lambda: DescopeAgenticCrew(user_id="bench-user", access_token="bench-token").crew(),
+        args.iterations,
+    )
+    factory = CrewFactory()
+    print(f"{'CrewFactory startup':<28} {factory.startup_seconds * 1000:8.2f} ms (once)")
+    _measure(
+        "CrewFactory.build()",
+        lambda: factory.build(user_id="bench-user", access_token="bench-token"),
+        args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    main()
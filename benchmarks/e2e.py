@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""Offline end-to-end benchmark for the MCP server.
+
+Starts create_app() against local Descope/Google stand-ins and a scripted LLM
+behind litellm.completion, drives concurrent MCP sessions calling run_crew and
+reports latency percentiles, throughput and a per-stage breakdown. No network
+access or API keys are needed, so it runs on a plain Linux CI box:
+
+    uv run python benchmarks/e2e.py --sessions 8 --requests 5 --fail-p95-ms 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "src", "descope_agentic_crew"))
+
+from fakes import FakeDescope, FakeGoogle, ScriptedLLM, ServerThread, StageTimes, free_port  # noqa: E402
+
+DEFAULT_REQUESTS = [
+    "Schedule a meeting with Kevin tomorrow at 2pm",
+    "search my contacts for Alice",
+    "Book lunch tomorrow at noon",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_stack(args, stages: StageTimes):
+    """Start the stand-ins, point the server at them, then import and serve it."""
+    project_id = "bench-project"
+    descope = FakeDescope(project_id, stages, latency=args.descope_latency_ms / 1000)
+    google = FakeGoogle(stages, latency=args.google_latency_ms / 1000, contacts=args.contacts)
+    descope_server = ServerThread(descope.app).start()
+    google_server = ServerThread(google.app).start()
+
+    app_port = free_port()
+    os.environ.update({
+        "DESCOPE_PROJECT_ID": project_id,
+        "MCP_SERVER_ID": "bench-server",
+        "MCP_SERVER_URL": f"http://127.0.0.1:{app_port}",
+        "DESCOPE_API_BASE": descope_server.url,
+        "DESCOPE_MANAGEMENT_KEY": "bench",
+        "GOOGLE_API_ROOT": google_server.url,
+        "ANTHROPIC_API_KEY": os.environ.get("ANTHROPIC_API_KEY", "bench"),
+    })
+    # Measure the production logging setup unless the caller asks otherwise.
+    os.environ.setdefault("APP_ENV", "production")
+    # The mix repeats requests; replaying cached results would hide the crew cost.
+    os.environ.setdefault("RESULT_CACHE_TTL", "0")
+
+    # Swap the LLM before crew.py wraps litellm.completion, so the server's own
+    # wrapper (and anything layered on it) stays in the measured path.
+    import litellm
+    litellm.completion = ScriptedLLM(litellm.completion, stages, latency=args.llm_latency_ms / 1000)
+
+    import api
+    app_server = ServerThread(api.create_app(), port=app_port).start()
+    return descope, [descope_server, google_server, app_server], app_server.url
+
+
+async def run_session(url: str, token: str, requests: list[str], latencies: list[float], errors: list[str]):
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    async with streamablehttp_client(f"{url}/mcp", headers={"Authorization": f"Bearer {token}"}) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for user_request in requests:
+                started = time.perf_counter()
+                result = await session.call_tool("run_crew", {"user_request": user_request})
+                latencies.append(time.perf_counter() - started)
+                text = " ".join(getattr(c, "text", "") for c in result.content)
+                if result.isError or "failed" in text.lower() or text.startswith("Error"):
+                    errors.append(text[:200])
+
+
+async def drive(url: str, descope: FakeDescope, args) -> tuple[list[float], list[str], float]:
+    latencies: list[float] = []
+    errors: list[str] = []
+    mix = args.request or DEFAULT_REQUESTS
+    sessions = []
+    for i in range(args.sessions):
+        token = descope.mint(f"bench-user-{i % args.users}")
+        requests = [mix[(i + j) % len(mix)] for j in range(args.requests)]
+        sessions.append(run_session(url, token, requests, latencies, errors))
+    started = time.perf_counter()
+    await asyncio.gather(*sessions)
+    return latencies, errors, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent MCP sessions")
+    parser.add_argument("--requests", type=int, default=3, help="run_crew calls per session")
+    parser.add_argument("--users", type=int, default=4, help="distinct users the sessions are spread over")
+    parser.add_argument("--contacts", type=int, default=500, help="contacts per user in the People stub")
+    parser.add_argument("--descope-latency-ms", type=float, default=20)
+    parser.add_argument("--google-latency-ms", type=float, default=40)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--request", action="append", help="user_request to send (repeatable); default mix otherwise")
+    parser.add_argument("--warmup", type=int, default=1, help="sequential warm-up calls before measuring")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--fail-p95-ms", type=float, help="exit non-zero if p95 latency exceeds this")
+    args = parser.parse_args()
+
+    stages = StageTimes()
+    descope, servers, url = start_stack(args, stages)
+    try:
+        if args.warmup:
+            warm = argparse.Namespace(**{**vars(args), "sessions": 1, "requests": args.warmup})
+            asyncio.run(drive(url, descope, warm))
+            stages.reset()
+        latencies, errors, elapsed = asyncio.run(drive(url, descope, args))
+    finally:
+        for server in reversed(servers):
+            server.stop()
+
+    total = len(latencies)
+    report = {
+        "requests": total,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "stages": {
+            stage: {
+                "calls": len(samples),
+                "calls_per_request": round(len(samples) / total, 2) if total else 0.0,
+                "mean_ms": round(statistics.fmean(samples) * 1000, 1),
+                "ms_per_request": round(sum(samples) * 1000 / total, 1) if total else 0.0,
+            }
+            for stage, samples in sorted(stages.snapshot().items())
+        },
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        lat = report["latency_ms"]
+        print(f"requests={total} errors={len(errors)} elapsed={report['elapsed_s']}s "
+              f"throughput={report['throughput_rps']} req/s")
+        print(f"latency p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms mean={lat['mean']}ms")
+        print(f"{'stage':<24}{'calls':>8}{'calls/req':>11}{'mean ms':>10}{'ms/req':>10}")
+        for stage, row in report["stages"].items():
+            print(f"{stage:<24}{row['calls']:>8}{row['calls_per_request']:>11}{row['mean_ms']:>10}{row['ms_per_request']:>10}")
+        for error in errors[:5]:
+            print(f"error: {error}")
+
+    if errors:
+        return 1
+    if args.fail_p95_ms is not None and report["latency_ms"]["p95"] > args.fail_p95_ms:
+        print(f"p95 {report['latency_ms']['p95']}ms exceeds budget {args.fail_p95_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
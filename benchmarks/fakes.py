@@ -0,0 +1,340 @@
+"""Local stand-ins for Descope, Google Calendar/People and the LLM.
+
+Each stub records how long it spent on every call so the benchmark can break
+end-to-end latency down by stage.
+"""
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from email.parser import BytesParser, Parser
+
+import jwt as pyjwt
+import uvicorn
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+FIRST_NAMES = ["Kevin", "Alice", "Bob", "Carol", "Dana", "Eve", "Frank", "Grace", "Heidi", "Ivan"]
+LAST_NAMES = ["Smith", "Jones", "Lee", "Garcia", "Chen", "Patel", "Kim", "Nguyen", "Brown", "Davis"]
+
+
+class StageTimes:
+    """Thread-safe accumulator of per-stage service time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def snapshot(self) -> dict[str, list[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._samples.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServerThread:
+    """Runs an ASGI app under uvicorn on a background thread."""
+
+    def __init__(self, app, port: int | None = None):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self) -> "ServerThread":
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"server on port {self.port} failed to start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class FakeDescope:
+    """JWKS endpoints, token minting and the outbound-token vault."""
+
+    def __init__(self, project_id: str, stages: StageTimes, latency: float = 0.0, token_ttl: int = 3600):
+        self.project_id = project_id
+        self.stages = stages
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.kid = "bench-key"
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(RSAAlgorithm.to_jwk(self._key.public_key()))
+        jwk.update({"kid": self.kid, "alg": "RS256", "use": "sig"})
+        self._jwks = {"keys": [jwk]}
+        self.app = Starlette(routes=[
+            Route(f"/{project_id}/.well-known/jwks.json", self._jwks_endpoint),
+            Route(f"/v2/keys/{project_id}", self._jwks_endpoint),
+            Route("/v1/mgmt/outbound/app/user/token/latest", self._outbound_token, methods=["POST"]),
+        ])
+
+    def mint(self, user_id: str) -> str:
+        now = int(time.time())
+        claims = {"sub": user_id, "iss": "bench", "iat": now, "exp": now + 3600,
+                  "scope": "google-calendar google-contacts", "azp": "bench-client"}
+        return pyjwt.encode(claims, self._key, algorithm="RS256", headers={"kid": self.kid})
+
+    async def _jwks_endpoint(self, request):
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        self.stages.record("descope.jwks", time.perf_counter() - started)
+        return JSONResponse(self._jwks)
+
+    async def _outbound_token(self, request):
+        started = time.perf_counter()
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+        token = {
+            "appId": body.get("appId"),
+            "userId": body.get("userId"),
+            "accessToken": f"google-{body.get('appId')}-{body.get('userId')}",
+            "accessTokenExpiry": str(int(time.time()) + self.token_ttl),
+        }
+        self.stages.record("descope.outbound_token", time.perf_counter() - started)
+        return JSONResponse({"token": token})
+
+
+class FakeGoogle:
+    """Calendar v3 and People v1 endpoints the tools use."""
+
+    def __init__(self, stages: StageTimes, latency: float = 0.0, contacts: int = 500, seed: int = 7):
+        self.stages = stages
+        self.latency = latency
+        rng = random.Random(seed)
+        self.people = []
+        for i in range(contacts):
+            first, last = FIRST_NAMES[i % len(FIRST_NAMES)], rng.choice(LAST_NAMES)
+            self.people.append({
+                "resourceName": f"people/c{i}",
+                "names": [{"displayName": f"{first} {last}", "givenName": first, "familyName": last}],
+                "emailAddresses": [{"value": f"{first.lower()}.{last.lower()}{i}@example.com"}],
+                "phoneNumbers": [{"value": f"+1 555 {i:07d}"}],
+                "organizations": [{"name": rng.choice(["Acme", "Globex", "Initech"]), "title": "Engineer"}],
+                "addresses": [{"formattedValue": f"{i} Main St, Springfield"}],
+            })
+        self.by_resource = {p["resourceName"]: p for p in self.people}
+        self.events: dict[str, dict] = {}
+        self.app = Starlette(routes=[
+            Route("/calendar/v3/calendars/{calendar_id}/events", self._insert_event, methods=["POST"]),
+            Route("/calendar/v3/calendars/{calendar_id}/events/{event_id}", self._get_event),
+            Route("/calendar/v3/calendars/{calendar_id}/events", self._list_events, methods=["GET"]),
+            Route("/calendar/v3/freeBusy", self._freebusy, methods=["POST"]),
+            Route("/batch/calendar/v3", self._batch, methods=["POST"]),
+            Route("/v1/people/me/connections", self._list_connections),
+            Route("/v1/people:batchGet", self._batch_get_people),
+        ])
+
+    async def _insert_event(self, request):
+        started = time.perf_counter()
+        event = await request.json()
+        await asyncio.sleep(self.latency)
+        event.setdefault("id", uuid.uuid4().hex)
+        event["status"] = "confirmed"
+        duplicate = event["id"] in self.events
+        self.events.setdefault(event["id"], event)
+        self.stages.record("google.calendar", time.perf_counter() - started)
+        if duplicate:
+            return JSONResponse({"error": {"code": 409, "message": "The requested identifier already exists."}},
+                                status_code=409)
+        return JSONResponse(event)
+
+    async def _get_event(self, request):
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        event = self.events.get(request.path_params["event_id"])
+        self.stages.record("google.calendar", time.perf_counter() - started)
+        if event is None:
+            return JSONResponse({"error": {"code": 404, "message": "Not Found"}}, status_code=404)
+        return JSONResponse(event)
+
+    async def _list_events(self, request):
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        # Sync tokens are just "everything": the stand-in has no change log,
+        # so an incremental sync returns no changes.
+        items = [] if request.query_params.get("syncToken") else [
+            e for e in self.events.values() if e.get("status") != "cancelled"
+        ]
+        self.stages.record("google.calendar", time.perf_counter() - started)
+        return JSONResponse({"items": items, "nextSyncToken": "bench-calendar-sync"})
+
+    async def _freebusy(self, request):
+        started = time.perf_counter()
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+        calendars = {item["id"]: {"busy": []} for item in body.get("items", [])}
+        self.stages.record("google.freebusy", time.perf_counter() - started)
+        return JSONResponse({"kind": "calendar#freeBusy", "calendars": calendars})
+
+    async def _batch(self, request):
+        """multipart/mixed batch of Calendar insert/patch/delete/get calls."""
+        started = time.perf_counter()
+        body = await request.body()
+        await asyncio.sleep(self.latency)
+        envelope = BytesParser().parsebytes(
+            f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode() + body
+        )
+        boundary = f"batch_{uuid.uuid4().hex}"
+        chunks = []
+        for part in envelope.get_payload():
+            content_id = part["Content-ID"].strip("<>")
+            request_line, _, rest = part.get_payload().partition("\n")
+            method, path, _ = request_line.split(" ", 2)
+            inner = Parser().parsestr(rest)
+            payload = inner.get_payload().strip()
+            status, result = self._calendar_call(method, path.split("?", 1)[0], json.loads(payload) if payload else None)
+            reason = {200: "OK", 204: "No Content", 404: "Not Found", 409: "Conflict"}[status]
+            text = json.dumps(result) if result is not None else ""
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n\r\n{text}\r\n"
+            )
+        self.stages.record("google.calendar_batch", time.perf_counter() - started)
+        return Response("".join(chunks) + f"--{boundary}--\r\n", media_type=f"multipart/mixed; boundary={boundary}")
+
+    def _calendar_call(self, method: str, path: str, body):
+        event_id = path.rstrip("/").split("/events", 1)[1].strip("/") or None
+        if method == "POST":
+            body.setdefault("id", uuid.uuid4().hex)
+            if body["id"] in self.events:
+                return 409, {"error": {"code": 409, "message": "The requested identifier already exists."}}
+            body["status"] = "confirmed"
+            self.events[body["id"]] = body
+            return 200, body
+        event = self.events.get(event_id)
+        if event is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        if method == "PATCH":
+            event.update(body or {})
+            return 200, event
+        if method == "DELETE":
+            # Like Calendar, keep the cancelled event: its id can't be reused.
+            event["status"] = "cancelled"
+            return 204, None
+        return 200, event
+
+    async def _list_connections(self, request):
+        started = time.perf_counter()
+        params = request.query_params
+        await asyncio.sleep(self.latency)
+        if params.get("syncToken"):
+            body = {"connections": []}
+            if params.get("requestSyncToken") == "true":
+                body["nextSyncToken"] = "bench-sync"
+        else:
+            size = int(params.get("pageSize", 100))
+            offset = int(params.get("pageToken") or 0)
+            fields = params.get("personFields", "")
+            page = [self._project(p, fields) for p in self.people[offset:offset + size]]
+            body = {"connections": page, "totalPeople": len(self.people)}
+            if offset + size < len(self.people):
+                body["nextPageToken"] = str(offset + size)
+            elif params.get("requestSyncToken") == "true":
+                body["nextSyncToken"] = "bench-sync"
+        self.stages.record("google.people", time.perf_counter() - started)
+        return JSONResponse(body)
+
+    async def _batch_get_people(self, request):
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        fields = request.query_params.get("personFields", "")
+        responses = [
+            {"requestedResourceName": rn, "person": self._project(self.by_resource[rn], fields)}
+            for rn in request.query_params.getlist("resourceNames") if rn in self.by_resource
+        ]
+        self.stages.record("google.people_batch_get", time.perf_counter() - started)
+        return JSONResponse({"responses": responses})
+
+    @staticmethod
+    def _project(person: dict, fields: str) -> dict:
+        """Only the requested personFields, as the People API returns them."""
+        keep = set(fields.split(",")) if fields else set(person)
+        return {k: v for k, v in person.items() if k == "resourceName" or k in keep}
+
+
+class ScriptedLLM:
+    """Deterministic replacement for litellm.completion.
+
+    Answers just enough of CrewAI's ReAct protocol for every agent to call its
+    tool once and then finish, and returns a valid plan for the planner.
+    """
+
+    _EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+    _WITH = re.compile(r"\bwith\s+([A-Z][a-z]+)")
+
+    def __init__(self, real_completion, stages: StageTimes, latency: float = 0.0):
+        self._real = real_completion
+        self.stages = stages
+        self.latency = latency
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        messages = kwargs.get("messages") or []
+        text = "\n".join(self._text(m) for m in messages)
+        reply = self._reply(messages, text)
+        time.sleep(self.latency)
+        response = self._real(model=kwargs.get("model", "anthropic/bench"), messages=messages,
+                              mock_response=reply)
+        self.stages.record("llm", time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _text(message) -> str:
+        # Prompt caching turns some messages into lists of content blocks.
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            return "".join(block.get("text", "") for block in content)
+        return str(content)
+
+    def _reply(self, messages, text) -> str:
+        if "list_of_plans_per_task" in text or "Task Execution Planner" in text:
+            plans = [{"task_number": n, "task": f"Task {n}", "plan": " Follow the task description."}
+                     for n in (1, 2)]
+            return ("Thought: I now can give a great answer\nFinal Answer: "
+                    + json.dumps({"list_of_plans_per_task": plans}))
+
+        observed = any(m.get("role") == "assistant" and "Observation:" in self._text(m) for m in messages)
+        if observed:
+            last = next(self._text(m) for m in reversed(messages)
+                        if m.get("role") == "assistant" and "Observation:" in self._text(m))
+            result = last.split("Observation:", 1)[1].strip()
+            return f"Thought: I now know the final answer\nFinal Answer: {result}"
+
+        if "Calendar Management Specialist" in text:
+            emails = self._EMAIL.findall(text)
+            args = {"event_title": "Benchmark meeting", "start_time": "2030-01-01T14:00:00",
+                    "end_time": "2030-01-01T15:00:00", "invitees": emails[0] if emails else None}
+            return ("Thought: I will create the event.\nAction: Create Calendar Event\n"
+                    f"Action Input: {json.dumps({k: v for k, v in args.items() if v})}")
+
+        match = self._WITH.search(text)
+        query = match.group(1) if match else FIRST_NAMES[0]
+        return ("Thought: I should search the contacts.\nAction: Google Contacts Search\n"
+                f"Action Input: {json.dumps({'query': query})}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""Startup cost of the MCP server: import time and time to first response.
+
+    uv run python benchmarks/import_profile.py [--top 15] [--serve] [--json]
+
+Runs ``python -X importtime`` on ``import api`` (what every worker pays before
+it can bind) and on ``import crew`` (the stack CREW_WARMUP loads afterwards),
+and aggregates self time per top-level package. With ``--serve`` it also
+starts the server under uvicorn and reports how long until the protected
+resource metadata route answers, how long until the crew runtime has warmed
+up, and resident memory at both points. Descope is pointed at a closed local
+port, so no network access or credentials are needed.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "descope_agentic_crew"))
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def profile_import(module: str) -> dict:
+    """Import ``module`` in a fresh interpreter and break its import time down."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC, env={**os.environ, "PYTHONPATH": SRC}, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+
+    # Entries are printed when each import finishes, so the module's subtree is
+    # everything between the previous top-level entry and its own line.
+    end = max(i for i, e in enumerate(entries) if e[0] == 0 and e[1] == module)
+    start = max((i for i, e in enumerate(entries[:end]) if e[0] == 0), default=-1) + 1
+    subtree = entries[start:end + 1]
+    by_package: dict[str, int] = defaultdict(int)
+    for _, name, self_us, _ in subtree:
+        by_package[name.split(".")[0]] += self_us
+    return {
+        "module": module,
+        "total_ms": round(entries[end][3] / 1000, 1),
+        "modules": len(subtree),
+        "packages": {pkg: round(us / 1000, 1) for pkg, us in sorted(by_package.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mib(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _wait_for(url: str, started: float, timeout: float, predicate=lambda body: True):
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200 and predicate(resp.read().decode()):
+                    return round((time.perf_counter() - started) * 1000, 1)
+        except OSError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def profile_serve(timeout: float) -> dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "DESCOPE_PROJECT_ID": "profile",
+        "MCP_SERVER_ID": "profile",
+        "MCP_SERVER_URL": url,
+        "DESCOPE_API_BASE": f"http://127.0.0.1:{_free_port()}",  # nothing listens: fails fast
+        "CREW_WARMUP": os.environ.get("CREW_WARMUP", "background"),
+        "ANTHROPIC_API_KEY": os.environ.get("ANTHROPIC_API_KEY", "profile"),
+    }
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:create_app", "--factory", "--app-dir", SRC,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        first_response = _wait_for(f"{url}/.well-known/oauth-protected-resource/mcp", started, timeout)
+        rss_bound = _rss_mib(proc.pid)
+        warmed = _wait_for(f"{url}/metrics", started, timeout,
+                           lambda body: re.search(r"^crew_runtime_loaded 1$", body, re.M) is not None)
+        return {
+            "first_response_ms": first_response,
+            "rss_at_first_response_mib": rss_bound,
+            "crew_warm_ms": warmed,
+            "rss_warm_mib": _rss_mib(proc.pid) if warmed else None,
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="packages to list per profile")
+    parser.add_argument("--serve", action="store_true", help="also time server start to first response")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for the server in --serve")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--fail-import-ms", type=float, help="exit non-zero if importing api exceeds this")
+    args = parser.parse_args()
+
+    report = {"imports": [profile_import("api"), profile_import("crew")]}
+    if args.serve:
+        report["serve"] = profile_serve(args.timeout)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for profile in report["imports"]:
+            print(f"import {profile['module']}: {profile['total_ms']} ms, {profile['modules']} modules")
+            for pkg, ms in list(profile["packages"].items())[:args.top]:
+                print(f"  {pkg:<32}{ms:>10} ms")
+        if args.serve:
+            serve = report["serve"]
+            print(f"first response: {serve['first_response_ms']} ms (RSS {serve['rss_at_first_response_mib']} MiB)")
+            print(f"crew runtime warm: {serve['crew_warm_ms']} ms (RSS {serve['rss_warm_mib']} MiB)")
+
+    api_ms = report["imports"][0]["total_ms"]
+    if args.fail_import_ms is not None and api_ms > args.fail_import_ms:
+        print(f"import api took {api_ms} ms, budget {args.fail_import_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
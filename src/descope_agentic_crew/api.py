@@ -3,11 +3,15 @@ import asyncio
 import contextlib
 import os
 import sys
+import threading
+import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 from datetime import date
+from typing import Optional
 
 import jwt as pyjwt
-import requests as req_lib
 import uvicorn
 from jwt.algorithms import RSAAlgorithm
 from mcp.server import Server
@@ -16,80 +20,179 @@ from mcp.server.auth.middleware.bearer_auth import BearerAuthBackend, RequireAut
 from mcp.server.auth.provider import AccessToken
 from mcp.server.auth.routes import build_resource_metadata_url, create_protected_resource_routes
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
-from mcp.types import TextContent, Tool
+from mcp.types import CallToolResult, TextContent, Tool
 from pydantic import AnyHttpUrl
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.responses import PlainTextResponse
 from starlette.routing import Route
 from starlette.types import Receive, Scope, Send
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 sys.path.insert(0, os.path.dirname(__file__))
 
-from crew import DescopeAgenticCrew
+from deadline import RUN_CREW_MAX_TIMEOUT, RUN_CREW_TIMEOUT, Deadline, DeadlineExceeded, deadline_scope
+from dedupe import RequestCoalescer, request_key
+from executor import CrewExecutorBusy, FairCrewExecutor
+from jwks import JWKS_MIN_REFRESH_INTERVAL, JWKS_TTL, JWKSKeyManager, VerifiedTokenCache
+from logs import LOG_LEVEL, PRODUCTION, get_logger
+from metrics import REGISTRY, render_latest, span
+from progress import ProgressReporter
+from resilience import CircuitOpen, breaker, breaker_stats
+from router import CONTACTS_LOOKUP, classify, route_stats
+from session_store import shared_store
+from transport import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, SYNC_TRANSPORT_ERRORS, close_async_http_client, http_session, pool_stats,
+)
 
 DESCOPE_PROJECT_ID = os.getenv("DESCOPE_PROJECT_ID")
 MCP_SERVER_ID = os.getenv("MCP_SERVER_ID")
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:5001")
 
 DESCOPE_MANAGEMENT_KEY = os.getenv("DESCOPE_MANAGEMENT_KEY")
+DESCOPE_API_BASE = os.getenv("DESCOPE_API_BASE", "https://api.descope.com")
 DESCOPE_AS_URL = (
-    f"https://api.descope.com/v1/apps/agentic/{DESCOPE_PROJECT_ID}/{MCP_SERVER_ID}"
+    f"{DESCOPE_API_BASE}/v1/apps/agentic/{DESCOPE_PROJECT_ID}/{MCP_SERVER_ID}"
 )
 RESOURCE_URL = f"{MCP_SERVER_URL}/mcp"
 
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+# Stateless streamable HTTP keeps no per-session state in the process, so any
+# worker (or node behind a load balancer) can serve any request. It is forced
+# on with more than one worker, since uvicorn doesn't pin sessions to workers.
+MCP_STATELESS = MCP_WORKERS > 1 or os.getenv("MCP_STATELESS", "false").lower() in ("1", "true", "yes")
+# When to load crewai/litellm/googleapiclient and build the crew templates:
+# background (after the server binds), eager (before it binds) or lazy (first run_crew).
+CREW_WARMUP = os.getenv("CREW_WARMUP", "background")
+
+logger = get_logger("api")
+
 # The agentic AS OIDC discovery doc returns this as jwks_uri — it's the correct
 # endpoint for validating agentic OAuth tokens (not /v1/keys or /v2/keys which
 # the Descope SDK uses for standard session tokens).
 _JWKS_CANDIDATES = [
-    f"https://api.descope.com/{DESCOPE_PROJECT_ID}/.well-known/jwks.json",
-    f"https://api.descope.com/v2/keys/{DESCOPE_PROJECT_ID}",
+    f"{DESCOPE_API_BASE}/{DESCOPE_PROJECT_ID}/.well-known/jwks.json",
+    f"{DESCOPE_API_BASE}/v2/keys/{DESCOPE_PROJECT_ID}",
 ]
-_kid_cache: dict[str, object] = {}  # kid → RSA public key
+
+
+# Fetch every JWKS endpoint and auth variant at once and use the first good
+# answer per endpoint, instead of trying them one after another. Costs a few
+# extra requests per refresh; a slow or failing variant no longer delays the rest.
+JWKS_HEDGE = os.getenv("JWKS_HEDGE", "false").lower() in ("1", "true", "yes")
+
+
+def _jwks_auth_variants() -> list[tuple[str, dict]]:
+    return [("no-auth", {}), ("mgmt-key", {"Authorization": f"Bearer {DESCOPE_PROJECT_ID}:{DESCOPE_MANAGEMENT_KEY}"})]
+
+
+def _get_jwks(url: str, label: str, headers: dict) -> Optional[list[dict]]:
+    """One JWKS GET; None if it failed or the breaker refused it."""
+    try:
+        with breaker("descope-jwks").guard(SYNC_TRANSPORT_ERRORS) as outcome:
+            resp = http_session().get(url, headers=headers)
+            outcome.status = resp.status_code
+        logger.debug("JWKS GET %s (%s) → %s", url, label, resp.status_code)
+        if resp.ok:
+            keys = resp.json().get("keys", [])
+            logger.info("JWKS fetched", extra={"url": url, "kids": [k.get("kid") for k in keys]})
+            return keys
+    except CircuitOpen as e:
+        logger.debug("JWKS GET %s (%s) skipped: %s", url, label, e)
+    except Exception as e:
+        logger.warning("JWKS GET %s (%s) failed: %s", url, label, e)
+    return None
 
 
 def _fetch_keys(url: str) -> list[dict]:
     """Try fetching JWKS without auth, then with management key."""
-    for label, headers in [("no-auth", {}), ("mgmt-key", {"Authorization": f"Bearer {DESCOPE_PROJECT_ID}:{DESCOPE_MANAGEMENT_KEY}"})]:
-        try:
-            resp = req_lib.get(url, headers=headers, timeout=10)
-            print(f"[JWKS] GET {url} ({label}) → {resp.status_code}")
-            if resp.ok:
-                keys = resp.json().get("keys", [])
-                print(f"[JWKS]   kids: {[k.get('kid') for k in keys]}")
-                return keys
-        except Exception as e:
-            print(f"[JWKS] GET {url} ({label}) → ERROR: {e}")
+    for label, headers in _jwks_auth_variants():
+        keys = _get_jwks(url, label, headers)
+        if keys is not None:
+            return keys
     return []
 
 
+def _fetch_keys_hedged() -> list[dict]:
+    """All endpoints and auth variants in parallel; first success per endpoint."""
+    attempts = {
+        _jwks_pool.submit(_get_jwks, url, label, headers): url
+        for url in _JWKS_CANDIDATES
+        for label, headers in _jwks_auth_variants()
+    }
+    found: dict[str, list[dict]] = {}
+    try:
+        for future in as_completed(attempts, timeout=HTTP_CONNECT_TIMEOUT + HTTP_READ_TIMEOUT):
+            url = attempts[future]
+            keys = future.result()
+            if keys is not None and url not in found:
+                found[url] = keys
+                if len(found) == len(_JWKS_CANDIDATES):
+                    break
+    except FuturesTimeout:
+        logger.warning("JWKS hedged fetch timed out", extra={"fetched": list(found)})
+    return [jwk for url in _JWKS_CANDIDATES for jwk in found.get(url, [])]
+
+
+_jwks_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jwks") if JWKS_HEDGE else None
+
+
+def _fetch_all_keys() -> dict[str, object]:
+    # With a shared store, a JWKS another worker fetched moments ago is reused,
+    # so N workers starting (or refreshing for a rotated kid) cost one fetch.
+    shared = shared_store.get_json("jwks") if shared_store else None
+    if shared and time.time() - shared["fetched_at"] < JWKS_MIN_REFRESH_INTERVAL:
+        jwks = shared["keys"]
+    else:
+        if JWKS_HEDGE:
+            jwks = _fetch_keys_hedged()
+        else:
+            jwks = [jwk for url in _JWKS_CANDIDATES for jwk in _fetch_keys(url)]
+        if jwks and shared_store:
+            shared_store.set_json("jwks", {"keys": jwks, "fetched_at": time.time()}, ttl=JWKS_TTL)
+    return {jwk.get("kid", ""): RSAAlgorithm.from_jwk(jwk) for jwk in jwks}
+
+
+_key_manager = JWKSKeyManager(_fetch_all_keys)
+_verified_tokens = VerifiedTokenCache()
+
+
+_token_verifications = REGISTRY.counter(
+    "crew_token_verifications_total", "Bearer token verifications by result.", ("result",)
+)
+
+
 def _find_public_key(kid: str):
-    if kid in _kid_cache:
-        return _kid_cache[kid]
-    for url in _JWKS_CANDIDATES:
-        for jwk in _fetch_keys(url):
-            k = RSAAlgorithm.from_jwk(jwk)
-            _kid_cache[jwk.get("kid", "")] = k
-        if kid in _kid_cache:
-            print(f"[TokenVerifier] Found key {kid} at {url}")
-            return _kid_cache[kid]
-    return None
+    with span("key_lookup"):
+        return _key_manager.get_key(kid)
 
 
 class DescopeTokenVerifier:
     """Validates Descope agentic AS tokens by searching known JWKS endpoints."""
 
     async def verify_token(self, token: str) -> AccessToken | None:
+        # Repeat tokens within an MCP session skip the RSA verification.
+        cached = _verified_tokens.get(token)
+        if cached is not None:
+            _token_verifications.inc(result="cache_hit")
+            return cached
+        with span("token_verify"):
+            access_token = await self._verify(token)
+        _token_verifications.inc(result="ok" if access_token is not None else "failed")
+        return access_token
+
+    async def _verify(self, token: str) -> AccessToken | None:
         try:
             header = pyjwt.get_unverified_header(token)
             kid = header.get("kid", "")
             alg = header.get("alg", "RS256")
-            print(f"[TokenVerifier] kid={kid}, alg={alg}")
 
-            public_key = await asyncio.to_thread(_find_public_key, kid)
+            public_key = _key_manager.cached_key(kid)
+            if public_key is None:
+                public_key = await asyncio.to_thread(_find_public_key, kid)
             if public_key is None:
-                print(f"[TokenVerifier] FAILED — key {kid!r} not found in any JWKS")
+                logger.warning("Token rejected: key %r not found in any JWKS", kid)
                 return None
 
             payload = pyjwt.decode(
@@ -100,13 +203,13 @@ class DescopeTokenVerifier:
             )
             user_id = payload.get("sub") or payload.get("userId")
             iss = payload.get("iss", "")
-            print(f"[TokenVerifier] Success — user={user_id}, iss={iss}")
+            logger.info("Token verified", extra={"user_id": user_id, "iss": iss, "kid": kid, "sampled": True})
             raw_client_id = payload.get("azp") or payload.get("aud") or DESCOPE_PROJECT_ID
             client_id = raw_client_id[0] if isinstance(raw_client_id, list) else str(raw_client_id)
             scope_raw = payload.get("scope", "")
             scopes = scope_raw.split() if isinstance(scope_raw, str) else list(scope_raw or [])
             exp = payload.get("exp")
-            return AccessToken(
+            access_token = AccessToken(
                 token=token,
                 client_id=client_id,
                 scopes=scopes,
@@ -114,12 +217,83 @@ class DescopeTokenVerifier:
                 subject=user_id,
                 claims={k: v for k, v in payload.items() if k != "scope"},
             )
+            if exp:
+                _verified_tokens.put(token, access_token, float(exp))
+            return access_token
         except Exception as e:
-            print(f"[TokenVerifier] FAILED — {type(e).__name__}: {e}")
+            logger.warning("Token rejected: %s: %s", type(e).__name__, e)
             return None
 
 
+class _CrewRuntime:
+    """The crew stack, imported and built on first use.
+
+    crewai, litellm, googleapiclient and the tools take seconds to import, so
+    they stay out of module load: the auth and metadata routes answer as soon
+    as the server binds while this loads in the background (CREW_WARMUP).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.load_seconds = 0.0
+
+    def load(self) -> "_CrewRuntime":
+        if self.loaded:
+            return self
+        with self._lock:
+            if self.loaded:
+                return self
+            started = time.perf_counter()
+            from crew import CrewFactory, LLMUsage
+            from tools.custom_tool import (
+                GoogleContactsTool, calendar_store, contacts_store, outbound_token_cache_stats,
+            )
+
+            self.GoogleContactsTool = GoogleContactsTool
+            self.LLMUsage = LLMUsage
+            # Agents and tasks are parsed from the YAML config once per process.
+            self.factory = CrewFactory()
+            REGISTRY.register_stats("crew_factory", "Crew template build statistics.", self.factory.stats)
+            REGISTRY.register_stats("outbound_tokens", "Descope outbound token cache.", outbound_token_cache_stats)
+            REGISTRY.register_stats("contacts", "Per-user contacts index.", contacts_store.stats)
+            REGISTRY.register_stats("calendar", "Per-user calendar event index.", calendar_store.stats)
+            self.load_seconds = time.perf_counter() - started
+            self.loaded = True
+            logger.info("Crew runtime loaded", extra={"seconds": round(self.load_seconds, 3)})
+        return self
+
+    def warm_up(self) -> None:
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Crew runtime warm-up failed; it is retried on the first run_crew call")
+
+    async def ensure_loaded(self) -> "_CrewRuntime":
+        if self.loaded:
+            return self
+        return await asyncio.to_thread(self.load)
+
+    def stats(self) -> dict:
+        return {"loaded": int(self.loaded), "load_seconds": self.load_seconds}
+
+
 mcp_server = Server("crewai-calendar-contacts")
+crew_executor = FairCrewExecutor()
+request_coalescer = RequestCoalescer()
+crew_runtime = _CrewRuntime()
+
+REGISTRY.register_stats("crew_executor", "Crew executor queue and slot usage.", crew_executor.stats)
+REGISTRY.register_stats("crew_requests", "run_crew deduplication and result cache.", request_coalescer.stats)
+REGISTRY.register_stats("crew_runtime", "Lazy crew stack loading.", crew_runtime.stats)
+REGISTRY.register_stats("crew_routes", "run_crew requests per route.", route_stats)
+REGISTRY.register_stats("jwks", "JWKS key cache.", _key_manager.stats)
+REGISTRY.register_stats("verified_tokens", "Verified bearer token cache.", _verified_tokens.stats)
+REGISTRY.register_stats("http_pool", "Shared HTTP connection pool per host.", pool_stats, label="host")
+REGISTRY.register_stats("circuit_breaker", "Dependency circuit breakers (state: 0 closed, 1 half-open, 2 open).",
+                        breaker_stats, label="dependency")
+if shared_store:
+    REGISTRY.register_stats("session_store", "Shared cross-worker store.", shared_store.stats)
 
 
 @mcp_server.list_tools()
@@ -137,7 +311,28 @@ async def list_tools():
                     "user_request": {
                         "type": "string",
                         "description": "Natural language request for calendar or contacts operations",
-                    }
+                    },
+                    "planning": {
+                        "type": "boolean",
+                        "description": (
+                            "Run the CrewAI planning step first. Defaults to planning only "
+                            "for requests that need both a contact lookup and an event."
+                        ),
+                    },
+                    "idempotency_key": {
+                        "type": "string",
+                        "description": (
+                            "Optional client-chosen key; retries with the same key return the "
+                            "first call's result and never create a second calendar event."
+                        ),
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": (
+                            f"Time budget for the whole request (default {RUN_CREW_TIMEOUT:g}, "
+                            f"max {RUN_CREW_MAX_TIMEOUT:g}); remaining work is cancelled when it runs out."
+                        ),
+                    },
                 },
                 "required": ["user_request"],
             },
@@ -165,22 +360,113 @@ async def call_tool(name: str, arguments: dict):
 
     # Give the agents today's date so relative dates like "tomorrow" resolve
     # correctly (the model otherwise guesses the year).
-    dated_request = f"Today's date is {date.today().isoformat()}. {user_request}"
-
-    crew_instance = DescopeAgenticCrew(user_id=user_id, access_token=raw_token)
+    today = date.today().isoformat()
+    dated_request = f"Today's date is {today}. {user_request}"
+
+    # Every LLM call, tool call, HTTP request and executor slot this request
+    # starts is bounded by the deadline.
+    deadline = Deadline.for_request(arguments.get("timeout_seconds"))
+
+    # Milestones stream back over this request's MCP stream while the crew runs.
+    progress = ProgressReporter.from_request_context(mcp_server.request_context)
+    progress.emit("Request accepted")
+
+    route = classify(user_request, planning=arguments.get("planning"))
+    progress.emit(f"Route: {route.path} (planning {'on' if route.planning else 'off'})")
+
+    # Retries of the same request share one execution (and its result for a
+    # short while); the key also seeds the calendar event id.
+    key = request_key(user_id, user_request, today, route.planning,
+                      idempotency_key=arguments.get("idempotency_key"))
+    state, _ = request_coalescer.lookup(key)
+    if state == "cached":
+        progress.emit("Returning the result of an identical recent request")
+    elif state == "inflight":
+        progress.emit("Joined an identical request that is already running")
+
+    if not crew_runtime.loaded:
+        progress.emit("Loading the crew runtime")
+    runtime = await crew_runtime.ensure_loaded()
+
+    if route.path == CONTACTS_LOOKUP:
+        # A plain lookup needs no reasoning: call the tool directly, natively
+        # async on the event loop, so it holds no crew thread while it waits.
+        tool = runtime.GoogleContactsTool(user_id=user_id, access_token=raw_token, progress=progress,
+                                          request_hint=user_request, deadline=deadline)
+
+        async def execute():
+            with span("fast_path", route=route.path):
+                return await tool._arun(query=route.contact_query)
+    else:
+        # CrewAI's agent loop is synchronous (kickoff_async is kickoff on a
+        # thread), so crews still run on the fair executor's pool.
+        def run():
+            usage = runtime.LLMUsage()
+            try:
+                with span("crew_kickoff", route=route.path, planning=route.planning):
+                    return runtime.factory.build(
+                        user_id=user_id,
+                        access_token=raw_token,
+                        progress=progress,
+                        include_contacts=route.include_contacts,
+                        include_calendar=route.include_calendar,
+                        planning=route.planning,
+                        idempotency_key=key,
+                        usage=usage,
+                        request=user_request,
+                        deadline=deadline,
+                    ).kickoff(inputs={"user_request": dated_request})
+            finally:
+                logger.info("Crew LLM usage", extra={"user_id": user_id, "route": route.path,
+                                                     **usage.summary(), "sampled": True})
+
+        async def execute():
+            try:
+                return await crew_executor.run(user_id, run)
+            except asyncio.CancelledError:
+                # Abandoned by every caller: the crew thread stops at its next
+                # LLM call, tool call or HTTP request. A no-op if the caller
+                # already ended the deadline for another reason (timeout).
+                deadline.cancel("disconnected")
+                raise
 
     try:
-        result = await asyncio.to_thread(
-            lambda: crew_instance.crew().kickoff(inputs={"user_request": dated_request})
-        )
+        with deadline_scope(deadline):
+            # Tools report errors (breaker open, deadline, API errors) in their
+            # output; such a result must not be replayed to a retry.
+            result = await asyncio.wait_for(
+                request_coalescer.run(key, execute, cacheable=lambda _: not progress.tool_errors),
+                deadline.remaining(),
+            )
         return [TextContent(type="text", text=str(result))]
+    except asyncio.CancelledError:
+        # The client cancelled the call or went away.
+        request_coalescer.abandon(key)
+        raise
+    except (asyncio.TimeoutError, DeadlineExceeded) as e:
+        # Recorded before the abandoned run cancels the deadline as a disconnect.
+        deadline.cancel("timeout")
+        request_coalescer.abandon(key)
+        text = str(e) if isinstance(e, DeadlineExceeded) else f"Request timed out after {deadline.seconds:g}s"
+        if progress.partials:
+            text += "\n\nPartial results before the deadline:\n\n" + "\n\n".join(progress.partials)
+        return CallToolResult(content=[TextContent(type="text", text=text)], isError=True)
+    except CrewExecutorBusy as e:
+        return CallToolResult(content=[TextContent(type="text", text=str(e))], isError=True)
     except Exception as e:
-        return [TextContent(type="text", text=f"Crew execution failed: {str(e)}")]
+        text = f"Crew execution failed: {str(e)}"
+        if progress.partials:
+            text += "\n\nPartial results before the failure:\n\n" + "\n\n".join(progress.partials)
+        return [TextContent(type="text", text=text)]
+
+
+async def metrics_endpoint(request):
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
 
 
 def create_app() -> Starlette:
     token_verifier = DescopeTokenVerifier()
-    session_manager = StreamableHTTPSessionManager(app=mcp_server, stateless=False)
+    session_manager = StreamableHTTPSessionManager(app=mcp_server, stateless=MCP_STATELESS)
 
     resource_url = AnyHttpUrl(RESOURCE_URL)
     as_url = AnyHttpUrl(DESCOPE_AS_URL)
@@ -202,13 +488,23 @@ def create_app() -> Starlette:
 
     @contextlib.asynccontextmanager
     async def lifespan(app):
-        async with session_manager.run():
-            yield
+        key_refresher = asyncio.create_task(_key_manager.run_background_refresh())
+        if CREW_WARMUP == "eager":
+            crew_runtime.load()
+        elif CREW_WARMUP == "background":
+            asyncio.get_running_loop().run_in_executor(None, crew_runtime.warm_up)
+        try:
+            async with session_manager.run():
+                yield
+        finally:
+            key_refresher.cancel()
+            await close_async_http_client()
 
     return Starlette(
         debug=False,
         routes=[
             Route("/mcp", endpoint=protected_mcp),
+            Route("/metrics", endpoint=metrics_endpoint),
             *protected_resource_routes,
         ],
         middleware=[
@@ -220,5 +516,11 @@ def create_app() -> Starlette:
 
 
 if __name__ == "__main__":
-    app = create_app()
-    uvicorn.run(app, host="0.0.0.0", port=5001)
+    # uvicorn's access log is written synchronously per request; keep it for development only.
+    options = dict(host="0.0.0.0", port=5001, log_level=LOG_LEVEL.lower(), access_log=not PRODUCTION)
+    if MCP_WORKERS > 1:
+        # Each worker process imports this module and builds its own app.
+        uvicorn.run("api:create_app", factory=True, workers=MCP_WORKERS,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)), **options)
+    else:
+        uvicorn.run(create_app(), **options)
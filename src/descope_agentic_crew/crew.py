@@ -4,11 +4,70 @@ from crewai.project import CrewBase, agent, crew, task, before_kickoff, after_ki
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 import os
-from tools.custom_tool import CalendarCreateTool, GoogleContactsTool
+import threading
+import time
+from deadline import DeadlineExceeded
+from logs import CREW_VERBOSE, get_logger
+from metrics import LLM_FALLBACKS, LLM_TOKENS, span
+from tools.custom_tool import CalendarAvailabilityTool, CalendarBatchTool, CalendarCreateTool, GoogleContactsTool
 
 litellm.drop_params = True
 litellm.modify_params = True
 
+# Anthropic prompt caching. The system prompt (role, goal, backstory and tool
+# descriptions) is the same on every request, and each ReAct iteration resends
+# the conversation so far, so both are marked as cache breakpoints and later
+# calls read them from cache instead of re-processing them.
+LLM_PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "true").lower() in ("1", "true", "yes")
+_CACHE_CONTROL = {"type": "ephemeral"}
+# Extra litellm kwargs set by build_llm (the request's LLMUsage and Deadline,
+# and the profile's fallback models); removed before the call.
+_USAGE_PARAM = "crew_usage"
+_FALLBACKS_PARAM = "crew_fallbacks"
+_DEADLINE_PARAM = "crew_deadline"
+# Errors after which the next model in an llm_profile's fallbacks is tried.
+_FALLBACK_ERRORS = (
+    litellm.RateLimitError,
+    litellm.Timeout,
+    litellm.APIConnectionError,
+    litellm.ServiceUnavailableError,
+    litellm.InternalServerError,
+)
+
+logger = get_logger("crew")
+
+
+def _supports_prompt_cache(model: str) -> bool:
+    return model.startswith("anthropic/") or "claude" in model
+
+
+def _with_cache_control(message: dict) -> dict:
+    content = message.get("content")
+    if isinstance(content, str) and content:
+        blocks = [{"type": "text", "text": content}]
+    elif isinstance(content, list) and content:
+        blocks = list(content)
+    else:
+        return message
+    blocks[-1] = {**blocks[-1], "cache_control": _CACHE_CONTROL}
+    return {**message, "content": blocks}
+
+
+def _mark_cache_breakpoints(messages: list) -> list:
+    """Breakpoints after the system prompt and after the last message.
+
+    The caller's list is left untouched: CrewAI keeps appending to it, and
+    the next call must send the same prefix for the cache to hit.
+    """
+    marked = list(messages)
+    system = next((i for i, m in enumerate(marked) if m.get("role") == "system"), None)
+    if system is not None:
+        marked[system] = _with_cache_control(marked[system])
+    if len(marked) - 1 != system:
+        marked[-1] = _with_cache_control(marked[-1])
+    return marked
+
+
 # Claude Opus 4.8 (and the 4.6+ family) reject assistant-message prefill, which
 # CrewAI's ReAct loop relies on. The installed litellm predates these models and
 # doesn't strip the trailing assistant turn, so we ensure every request ends with
@@ -17,15 +76,111 @@ _orig_completion = litellm.completion
 
 
 def _completion_no_prefill(*args, **kwargs):
+    usage = kwargs.pop(_USAGE_PARAM, None)
+    deadline = kwargs.pop(_DEADLINE_PARAM, None)
+    models = [kwargs.get("model", ""), *(kwargs.pop(_FALLBACKS_PARAM, None) or ())]
+    for i, model in enumerate(models):
+        if deadline is not None:
+            # No LLM call starts after the deadline, and none may outlive it.
+            deadline.check("llm")
+            kwargs["timeout"] = deadline.timeout(kwargs.get("timeout") or float("inf"))
+        try:
+            response = _complete(args, {**kwargs, "model": model})
+        except _FALLBACK_ERRORS as e:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"LLM call to {model} cut off by the request deadline") from e
+            if i == len(models) - 1:
+                raise
+            LLM_FALLBACKS.inc(model=model, reason=type(e).__name__)
+            logger.warning("LLM %s failed (%s); falling back to %s", model, type(e).__name__, models[i + 1])
+            continue
+        counts = _record_usage(model, response)
+        if usage is not None and counts:
+            usage.add(counts)
+        return response
+
+
+def _complete(args, kwargs):
+    model = kwargs["model"]
     msgs = kwargs.get("messages")
+    if LLM_PROMPT_CACHE and _supports_prompt_cache(model):
+        if isinstance(msgs, list) and msgs:
+            # Marked before the prefill nudge below, which is never part of the
+            # history the next iteration resends.
+            msgs = kwargs["messages"] = _mark_cache_breakpoints(msgs)
+        tools = kwargs.get("tools")
+        if tools:
+            kwargs["tools"] = tools[:-1] + [{**tools[-1], "cache_control": _CACHE_CONTROL}]
     if isinstance(msgs, list) and msgs and msgs[-1].get("role") == "assistant":
         kwargs["messages"] = msgs + [{"role": "user", "content": "Continue."}]
-    return _orig_completion(*args, **kwargs)
+    with span("llm", model=model):
+        return _orig_completion(*args, **kwargs)
+
+
+def _record_usage(model, response) -> dict:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    counts = {
+        "prompt": getattr(usage, "prompt_tokens", None),
+        "completion": getattr(usage, "completion_tokens", None),
+        "cache_read": getattr(usage, "cache_read_input_tokens", None) or getattr(details, "cached_tokens", None),
+        "cache_write": getattr(usage, "cache_creation_input_tokens", None),
+    }
+    counts = {kind: count for kind, count in counts.items() if count}
+    for kind, count in counts.items():
+        LLM_TOKENS.inc(count, model=model, kind=kind)
+    return counts
 
 
 litellm.completion = _completion_no_prefill
 
-llm = LLM(model="anthropic/claude-opus-4-8")
+# Used by agents (and the planner) without an llm_profile in agents.yaml.
+DEFAULT_LLM_MODEL = "anthropic/claude-opus-4-8"
+
+
+def build_llm(profile: dict, usage=None, deadline=None) -> LLM:
+    """The LLM for an ``llm_profile`` block of agents.yaml.
+
+    ``model``, ``max_tokens`` and ``temperature`` go to litellm as-is;
+    ``fallbacks`` are tried in order when a call is rate limited, times out or
+    the model is unavailable. ``usage`` collects one request's token counts
+    and ``deadline`` bounds its calls.
+    """
+    params = {key: profile[key] for key in ("max_tokens", "temperature") if profile.get(key) is not None}
+    if profile.get("fallbacks"):
+        params[_FALLBACKS_PARAM] = list(profile["fallbacks"])
+    if usage is not None:
+        params[_USAGE_PARAM] = usage
+    if deadline is not None:
+        params[_DEADLINE_PARAM] = deadline
+    return LLM(model=profile.get("model", DEFAULT_LLM_MODEL), **params)
+
+
+def _agent_config(config: dict) -> tuple[dict, dict]:
+    """Split an agents.yaml entry into the Agent config and its llm_profile."""
+    config = dict(config or {})
+    return config, config.pop("llm_profile", None) or {}
+
+
+class LLMUsage:
+    """Token counts summed over every LLM call made for one run_crew request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens: dict[str, int] = {}
+
+    def add(self, counts: dict) -> None:
+        with self._lock:
+            self.calls += 1
+            for kind, count in counts.items():
+                self.tokens[kind] = self.tokens.get(kind, 0) + count
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"llm_calls": self.calls, **{f"{kind}_tokens": n for kind, n in self.tokens.items()}}
 
 @CrewBase
 class DescopeAgenticCrew():
@@ -36,21 +191,27 @@ class DescopeAgenticCrew():
     userId: str = None
     access_token: str = None
 
-    def __init__(self, user_id=None, access_token=None, *args, **kwargs):
+    def __init__(self, user_id=None, access_token=None, progress=None,
+                 include_contacts=True, include_calendar=True, planning=True, *args, **kwargs):
         self.user_id = user_id
         self.access_token = access_token
+        self.progress = progress
+        self.include_contacts = include_contacts
+        self.include_calendar = include_calendar
+        self.planning = planning
 
         super().__init__()
 
     @agent
     def calendar_manager(self) -> Agent:
         tools = []
-        
+        config, profile = _agent_config(self.agents_config.get('calendar_manager'))
+
         return Agent(
-            config=self.agents_config.get('calendar_manager', {}),
+            config=config,
             tools=tools,
-            llm=llm,
-            verbose=True,
+            llm=build_llm(profile),
+            verbose=CREW_VERBOSE,
             max_execution_time=60,  # Limit execution time to 60 seconds
             max_iter=3  # Reduced iterations to prevent loops
         )
@@ -58,12 +219,13 @@ class DescopeAgenticCrew():
     @agent
     def contacts_finder(self) -> Agent:
         tools = []
-        
+        config, profile = _agent_config(self.agents_config.get('contacts_finder'))
+
         return Agent(
-            config=self.agents_config.get('contacts_finder', {}),
+            config=config,
             tools=tools,
-            llm=llm,
-            verbose=True,
+            llm=build_llm(profile),
+            verbose=CREW_VERBOSE,
             max_execution_time=60,  # Limit execution time to 60 seconds
             max_iter=3  # Reduced iterations to prevent loops
         )
@@ -73,7 +235,7 @@ class DescopeAgenticCrew():
         task = Task(
             config=self.tasks_config.get('find_contact_task'),# type: ignore[index]
         )
-        task.tools = [GoogleContactsTool(user_id=self.user_id, access_token=self.access_token)]
+        task.tools = [GoogleContactsTool(user_id=self.user_id, access_token=self.access_token, progress=self.progress)]
         return task
 
     @task
@@ -81,21 +243,157 @@ class DescopeAgenticCrew():
         task = Task(
             config=self.tasks_config.get('create_calendar_task'),# type: ignore[index]
         )
-        task.tools = [CalendarCreateTool(user_id=self.user_id, access_token=self.access_token)]
+        task.tools = [
+            CalendarCreateTool(user_id=self.user_id, access_token=self.access_token, progress=self.progress),
+            CalendarBatchTool(user_id=self.user_id, access_token=self.access_token, progress=self.progress),
+            CalendarAvailabilityTool(user_id=self.user_id, access_token=self.access_token, progress=self.progress),
+        ]
         return task
 
     @crew
     def crew(self) -> Crew:
         """Creates the DescopeAgenticCrew crew - dynamically configured based on use case"""
+        wanted = set()
+        if self.include_contacts:
+            wanted.add('find_contact_task')
+        if self.include_calendar:
+            wanted.add('create_calendar_task')
+        tasks = [t for t in self.tasks if t.name in wanted]  # Created by the @task decorator
+        agents = list({id(t.agent): t.agent for t in tasks}.values())
 
+        callbacks = _ProgressCallbacks(self.progress, self.planning)
+        planning_llm = build_llm(_agent_config(self.agents_config.get('planner'))[1])
         return Crew(
-            agents=self.agents, # Automatically created by the @agent decorator
-            tasks=self.tasks, # Automatically created by the @task decorator
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
-            verbose=True,
-            planning=True,
-            planning_llm=llm,
-            manager_llm=llm,
+            verbose=CREW_VERBOSE,
+            planning=self.planning,
+            planning_llm=planning_llm,
+            manager_llm=planning_llm,
+            step_callback=callbacks.on_step,
+            task_callback=callbacks.on_task_done,
         )
-    
-    
+
+
+class _ProgressCallbacks:
+    """Crew step/task callbacks that forward milestones to a ProgressReporter."""
+
+    def __init__(self, progress, planning: bool = True):
+        self.progress = progress
+        # Nothing to report when the route turned planning off.
+        self._planning_reported = not planning
+
+    def on_step(self, step):
+        # Planning runs before any agent step, so the first step marks it done.
+        if self.progress is not None and not self._planning_reported:
+            self._planning_reported = True
+            self.progress.emit("Planning complete")
+
+    def on_task_done(self, output):
+        if self.progress is not None:
+            self.progress.emit(f"Finished task: {output.name or output.description[:60]}", partial=output.raw)
+
+
+_TASK_TOOLS = {
+    'find_contact_task': (GoogleContactsTool,),
+    'create_calendar_task': (CalendarCreateTool, CalendarBatchTool, CalendarAvailabilityTool),
+}
+# Tools that write to the calendar take the request's idempotency key.
+_IDEMPOTENT_TOOLS = (CalendarCreateTool, CalendarBatchTool)
+# Tools that shape their output from the user's request.
+_HINTED_TOOLS = (GoogleContactsTool,)
+
+
+def _tool_kwargs(tool_cls, idempotency_key, request, deadline) -> dict:
+    kwargs = {'deadline': deadline}
+    if tool_cls in _IDEMPOTENT_TOOLS:
+        kwargs['idempotency_key'] = idempotency_key
+    if tool_cls in _HINTED_TOOLS:
+        kwargs['request_hint'] = request
+    return kwargs
+
+
+class CrewFactory:
+    """Builds the agents and tasks from the YAML config once per process.
+
+    ``DescopeAgenticCrew`` re-reads and re-parses agents.yaml/tasks.yaml and
+    rebuilds every object on each instantiation. The factory does that a single
+    time and each ``build`` only copies the templates (agents carry execution
+    state, so they are never shared between concurrent crews) and attaches
+    user-bound tool instances.
+    """
+
+    def __init__(self):
+        started = time.perf_counter()
+        template = DescopeAgenticCrew()
+        template.crew()  # runs the @agent/@task methods and the YAML mapping
+        self._tasks = {t.name: t for t in template.tasks}
+        # Agents are matched to their llm_profile by role, like in build().
+        self._profiles = {
+            config['role']: profile
+            for config, profile in map(_agent_config, template.agents_config.values())
+            if 'role' in config
+        }
+        self._planner_profile = _agent_config(template.agents_config.get('planner'))[1]
+        self._planning_llm = build_llm(self._planner_profile)
+        self.startup_seconds = time.perf_counter() - started
+        self.builds = 0
+        self.build_seconds_total = 0.0
+
+    def build(self, user_id, access_token, progress=None,
+              include_contacts=True, include_calendar=True, planning=True, idempotency_key=None,
+              usage=None, request=None, deadline=None) -> Crew:
+        started = time.perf_counter()
+        names = []
+        if include_contacts:
+            names.append('find_contact_task')
+        if include_calendar:
+            names.append('create_calendar_task')
+
+        agents: dict[str, BaseAgent] = {}
+        tasks = []
+        task_mapping: dict[str, Task] = {}
+        for name in names:
+            template = self._tasks[name]
+            role = template.agent.role
+            if role not in agents:
+                agents[role] = template.agent.copy()
+                if usage is not None or deadline is not None:
+                    # A per-request LLM, so its calls are counted and bounded for this request.
+                    agents[role].llm = build_llm(self._profiles.get(role, {}), usage, deadline)
+            copied = template.copy(agents=list(agents.values()), task_mapping=task_mapping)
+            copied.tools = [
+                tool_cls(user_id=user_id, access_token=access_token, progress=progress,
+                         **_tool_kwargs(tool_cls, idempotency_key, request, deadline))
+                for tool_cls in _TASK_TOOLS[name]
+            ]
+            task_mapping[template.key] = copied
+            tasks.append(copied)
+
+        callbacks = _ProgressCallbacks(progress, planning)
+        if usage is not None or deadline is not None:
+            planning_llm = build_llm(self._planner_profile, usage, deadline)
+        else:
+            planning_llm = self._planning_llm
+        crew = Crew(
+            agents=list(agents.values()),
+            tasks=tasks,
+            process=Process.sequential,
+            verbose=CREW_VERBOSE,
+            planning=planning,
+            planning_llm=planning_llm,
+            manager_llm=planning_llm,
+            step_callback=callbacks.on_step,
+            task_callback=callbacks.on_task_done,
+        )
+        self.builds += 1
+        self.build_seconds_total += time.perf_counter() - started
+        return crew
+
+    def stats(self) -> dict:
+        return {
+            "startup_seconds": self.startup_seconds,
+            "builds": self.builds,
+            "build_seconds_avg": self.build_seconds_total / self.builds if self.builds else 0.0,
+        }
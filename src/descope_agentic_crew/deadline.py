@@ -0,0 +1,120 @@
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from typing import Optional
+
+from metrics import REGISTRY
+
+# Default end-to-end budget for one run_crew call; clients may ask for less
+# (or more, up to RUN_CREW_MAX_TIMEOUT) with the timeout_seconds argument.
+RUN_CREW_TIMEOUT = float(os.getenv("RUN_CREW_TIMEOUT", "180"))
+RUN_CREW_MAX_TIMEOUT = float(os.getenv("RUN_CREW_MAX_TIMEOUT", "600"))
+# Shortest timeout handed to a call, so one that starts just before the
+# deadline fails fast instead of being given zero.
+_MIN_CALL_TIMEOUT = 0.05
+
+CANCELLED_WORK = REGISTRY.counter(
+    "crew_cancelled_work_total",
+    "Steps skipped because the run_crew deadline passed or the client went away.",
+    ("stage", "reason"),
+)
+FREED_SECONDS = REGISTRY.counter(
+    "crew_cancelled_budget_seconds_total",
+    "Deadline budget left when a run_crew was cancelled (time its work no longer holds capacity).",
+    ("reason",),
+)
+
+
+class DeadlineExceeded(Exception):
+    """The run_crew deadline passed, or its client went away, before a step ran."""
+
+
+class Deadline:
+    """The time budget of one run_crew call, shared by everything it starts.
+
+    Checked before each LLM call, tool call, HTTP request and executor slot,
+    and used to cap their timeouts. ``cancel`` ends it early (client gone).
+    Safe to use from any thread.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_request(cls, requested=None) -> "Deadline":
+        try:
+            seconds = float(requested) if requested is not None else RUN_CREW_TIMEOUT
+        except (TypeError, ValueError):
+            seconds = RUN_CREW_TIMEOUT
+        return cls(min(max(seconds, 1.0), RUN_CREW_MAX_TIMEOUT))
+
+    def remaining(self) -> float:
+        if self.reason is not None:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        if self.reason is None and time.monotonic() >= self.expires_at:
+            with self._lock:
+                if self.reason is None:
+                    self.reason = "timeout"
+        return self.reason is not None
+
+    def cancel(self, reason: str = "disconnected") -> None:
+        with self._lock:
+            if self.reason is not None:
+                return
+            FREED_SECONDS.inc(max(0.0, self.expires_at - time.monotonic()), reason=reason)
+            self.reason = reason
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded instead of starting ``stage`` once the budget is gone."""
+        if self.expired:
+            raise self.exceeded(stage)
+
+    def exceeded(self, stage: str) -> DeadlineExceeded:
+        """Count ``stage`` as skipped for this (expired) deadline; the error saying why."""
+        reason = self.reason or "timeout"  # a call timed out on the deadline just before it passed
+        CANCELLED_WORK.inc(stage=stage, reason=reason)
+        what = "client disconnected" if reason == "disconnected" else f"deadline of {self.seconds:g}s passed"
+        return DeadlineExceeded(f"Request cancelled before {stage}: {what}")
+
+    def timeout(self, default: float) -> float:
+        """``default`` capped to the time left."""
+        return max(_MIN_CALL_TIMEOUT, min(default, self.remaining()))
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("run_crew_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check(stage: str) -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Make ``deadline`` current for this thread/task (no-op for None).
+
+    Context variables don't follow work into CrewAI's own worker threads, so
+    tools re-enter the scope with the deadline they were built with.
+    """
+    if deadline is None:
+        yield
+        return
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
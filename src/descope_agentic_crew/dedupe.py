@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# How long a completed run_crew result is replayed to identical calls (client retries).
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "120"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+
+_SPACE = re.compile(r"\s+")
+
+
+def request_key(user_id: str, user_request: str, day: str, *extra, idempotency_key: Optional[str] = None) -> str:
+    """Stable key for a run_crew call.
+
+    An explicit ``idempotency_key`` from the client wins; otherwise the request
+    text is normalized (case, whitespace, trailing punctuation) so a retried
+    call maps to the same key on the same day.
+    """
+    if idempotency_key:
+        parts = [user_id, "idem", idempotency_key]
+    else:
+        normalized = _SPACE.sub(" ", user_request.strip().lower()).rstrip(".!?")
+        parts = [user_id, normalized, day, *map(str, extra)]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class RequestCoalescer:
+    """Single-flight execution plus a short-lived result cache, per key.
+
+    Concurrent calls with the same key await one shared execution; once it
+    succeeds its result is served for ``ttl`` seconds. Failures, and results
+    the leader's ``cacheable`` rejects (e.g. one built on a tool error), are
+    not cached.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, ttl: float = RESULT_CACHE_TTL, max_entries: int = RESULT_CACHE_SIZE):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+        self._results: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.abandoned = 0
+
+    def lookup(self, key: str) -> tuple[str, object]:
+        """("cached", result), ("inflight", task) or ("miss", None), without side effects."""
+        entry = self._results.get(key)
+        if entry is not None:
+            if time.monotonic() < entry[1]:
+                return "cached", entry[0]
+            del self._results[key]
+        task = self._inflight.get(key)
+        if task is not None:
+            return "inflight", task
+        return "miss", None
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]],
+                  cacheable: Optional[Callable[[T], bool]] = None) -> T:
+        state, value = self.lookup(key)
+        if state == "cached":
+            self.cache_hits += 1
+            self._results.move_to_end(key)
+            return value
+        if state == "inflight":
+            self.coalesced += 1
+            task = value
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, cacheable))
+        # Shielded so a caller that disconnects doesn't cancel the run the
+        # other callers are waiting on.
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters.pop(key) - 1
+            if remaining:
+                self._waiters[key] = remaining
+
+    def abandon(self, key: str) -> bool:
+        """Cancel the in-flight run for ``key`` if no caller is waiting on it any more."""
+        task = self._inflight.get(key)
+        if task is None or task.done() or self._waiters.get(key):
+            return False
+        task.cancel()
+        self.abandoned += 1
+        return True
+
+    def _finish(self, key: str, task: asyncio.Task, cacheable: Optional[Callable[[object], bool]] = None) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self._ttl <= 0:
+            return
+        if cacheable is not None and not cacheable(task.result()):
+            return
+        self._results[key] = (task.result(), time.monotonic() + self._ttl)
+        self._results.move_to_end(key)
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "abandoned": self.abandoned,
+            "inflight": len(self._inflight),
+            "cached_results": len(self._results),
+        }
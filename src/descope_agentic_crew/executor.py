@@ -0,0 +1,131 @@
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from deadline import current_deadline
+from metrics import REGISTRY
+
+T = TypeVar("T")
+
+CREW_MAX_CONCURRENCY = int(os.getenv("CREW_MAX_CONCURRENCY", "8"))
+CREW_MAX_QUEUE = int(os.getenv("CREW_MAX_QUEUE", "32"))
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "crew_queue_wait_seconds", "Time run_crew jobs waited for a crew executor slot."
+)
+
+
+class CrewExecutorBusy(Exception):
+    """Raised when the crew queue is full; the caller should retry later."""
+
+
+class FairCrewExecutor:
+    """Dedicated thread pool for crew runs with per-user round-robin queueing.
+
+    At most ``max_concurrency`` crews run at once. Waiting jobs are queued per
+    user and slots are handed out round-robin across users, so one chatty
+    client can't starve everyone else. Once ``max_queue`` jobs are waiting, new
+    submissions fail fast with ``CrewExecutorBusy`` instead of timing out.
+    A job whose run_crew deadline passes while it waits gives up its place
+    and never starts. Must be used from a single event loop.
+    """
+
+    def __init__(self, max_concurrency: int = CREW_MAX_CONCURRENCY, max_queue: int = CREW_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="crew")
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._running = 0
+        self._queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def run(self, user_id: str, fn: Callable[[], T]) -> T:
+        loop = asyncio.get_running_loop()
+        deadline = current_deadline()
+        enqueued_at = time.monotonic()
+        if self._running < self.max_concurrency and not self._queued:
+            self._running += 1
+        else:
+            if self._queued >= self.max_queue:
+                self.rejected += 1
+                raise CrewExecutorBusy(
+                    f"Server busy: {self._running} crews running and {self._queued} queued. "
+                    "Please retry later."
+                )
+            slot = loop.create_future()
+            self._waiting.setdefault(user_id, deque()).append(slot)
+            self._queued += 1
+            try:
+                await asyncio.wait_for(slot, deadline.remaining() if deadline else None)
+            except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                if slot.done() and not slot.cancelled():
+                    self._release()  # granted a slot just as we were cancelled
+                else:
+                    self._forget(user_id, slot)
+                if deadline is not None and deadline.expired:
+                    self.expired += 1
+                    error = deadline.exceeded("crew_queue")
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise error from None
+                # A cancellation stays one, whatever the deadline says.
+                raise
+
+        waited = time.monotonic() - enqueued_at
+        QUEUE_WAIT_SECONDS.observe(waited)
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        if deadline is not None and deadline.expired:
+            # Expired (or its client left) while queued: hand the slot on unused.
+            self.expired += 1
+            self._release(completed=False)
+            deadline.check("crew_queue")
+
+        # The slot is held until the thread finishes, even if the awaiting
+        # request is cancelled, so running never exceeds the pool size.
+        ctx = contextvars.copy_context()
+        future = self._pool.submit(ctx.run, fn)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, completed: bool = True) -> None:
+        self._running -= 1
+        self.completed += completed
+        while self._waiting and self._running < self.max_concurrency:
+            user_id, queue = next(iter(self._waiting.items()))
+            slot = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(user_id)
+            else:
+                del self._waiting[user_id]
+            self._queued -= 1
+            if not slot.cancelled():
+                self._running += 1
+                slot.set_result(None)
+
+    def _forget(self, user_id: str, slot: asyncio.Future) -> None:
+        queue = self._waiting.get(user_id)
+        if queue is not None and slot in queue:
+            queue.remove(slot)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[user_id]
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "queued_users": len(self._waiting),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+JWKS_TTL = float(os.getenv("JWKS_TTL", "3600"))
+# An unknown kid may trigger at most one JWKS refetch per this many seconds,
+# so a flood of forged tokens can't turn into a flood of outbound requests.
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+JWKS_NEGATIVE_TTL = float(os.getenv("JWKS_NEGATIVE_TTL", "300"))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "4096"))
+
+_MAX_NEGATIVE_KIDS = 10_000
+
+
+class JWKSKeyManager:
+    """Caches the union of keys from the JWKS endpoints, keyed by kid.
+
+    ``fetch_keys()`` returns ``{kid: public_key}`` from every endpoint (an empty
+    dict when all of them fail). Keys are served for ``ttl`` seconds, refreshed
+    in the background before they go stale, and kept past expiry if a refresh
+    fails so a Descope blip doesn't reject every request.
+    """
+
+    def __init__(self, fetch_keys: Callable[[], dict[str, object]], ttl: float = JWKS_TTL,
+                 min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL,
+                 negative_ttl: float = JWKS_NEGATIVE_TTL):
+        self._fetch_keys = fetch_keys
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._negative_ttl = negative_ttl
+        self._keys: dict[str, object] = {}
+        self._fetched_at = 0.0
+        self._last_attempt = float("-inf")
+        self._unknown: dict[str, float] = {}  # kid → negative-cache expiry
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.negative_hits = 0
+
+    def cached_key(self, kid: str):
+        """The key for kid if it is cached and fresh; never does I/O."""
+        if time.monotonic() - self._fetched_at < self._ttl:
+            return self._keys.get(kid)
+        return None
+
+    def get_key(self, kid: str):
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and now - self._fetched_at < self._ttl:
+            return key
+        if key is None:
+            expiry = self._unknown.get(kid)
+            if expiry is not None and now < expiry:
+                self.negative_hits += 1
+                return None
+        refreshed = False
+        if now - self._last_attempt >= self._min_refresh_interval:
+            refreshed = self.refresh()
+        key = self._keys.get(kid)
+        # Only a kid missing from a JWKS fetched just now is known to be bad; one
+        # we couldn't refetch for (rate limit, failure) may be a rotated key.
+        if key is None and refreshed:
+            with self._lock:
+                if len(self._unknown) >= _MAX_NEGATIVE_KIDS:
+                    self._unknown.clear()
+                self._unknown[kid] = time.monotonic() + self._negative_ttl
+        return key
+
+    def refresh(self) -> bool:
+        """Refetch the JWKS; concurrent callers wait for the one in flight.
+
+        True if keys were fetched successfully since the call started.
+        """
+        started = time.monotonic()
+        with self._refresh_lock:
+            if self._last_attempt >= started:
+                # another thread refreshed while we waited
+                return self._fetched_at >= started
+            self._last_attempt = time.monotonic()
+            self.refreshes += 1
+            keys = self._fetch_keys()
+            if not keys:
+                self.refresh_failures += 1
+                return False
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+                self._unknown = {k: v for k, v in self._unknown.items() if k not in keys}
+            return True
+
+    async def run_background_refresh(self) -> None:
+        """Keep keys warm: fetch at startup, then shortly before each TTL expiry."""
+        while True:
+            await asyncio.to_thread(self.refresh)
+            delay = self._ttl * 0.8 if self._keys else self._min_refresh_interval
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "age_seconds": time.monotonic() - self._fetched_at if self._keys else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "negative_kids": len(self._unknown),
+            "negative_hits": self.negative_hits,
+        }
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified tokens, valid until the token's exp.
+
+    Keyed by a SHA-256 of the raw token so bearer tokens aren't held as keys.
+    """
+
+    def __init__(self, max_size: int = VERIFIED_TOKEN_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[object]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry[1]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, value: object, expires_at: float) -> None:
+        if expires_at <= time.time() or self._max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
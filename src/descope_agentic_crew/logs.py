@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+APP_ENV = os.getenv("APP_ENV", "development")
+PRODUCTION = APP_ENV == "production"
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json" if PRODUCTION else "text")  # json | text
+# Fraction of high-volume (per-request) records kept; warnings and errors are never sampled.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1" if PRODUCTION else "1.0"))
+# CrewAI's verbose mode writes every agent step straight to stdout from the crew thread.
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false" if PRODUCTION else "true").lower() in ("1", "true", "yes")
+
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra=`` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = {k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith("_")}
+        if extras:
+            line += " " + " ".join(f"{k}={v}" for k, v in extras.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps ``LOG_SAMPLE_RATE`` of records logged with ``extra={"sampled": True}``."""
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stdlib handler formats the message on the calling thread; only merge
+    # the args here and leave all formatting to the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_text = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """Route the app's loggers through a queue drained by one background thread.
+
+    Request handlers and crew threads only enqueue records; the stdout write
+    (and JSON encoding) happens on the listener thread. Safe to call repeatedly.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger("descope_agentic_crew")
+        root.setLevel(LOG_LEVEL)
+        root.handlers[:] = [handler]
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"descope_agentic_crew.{name}")
@@ -0,0 +1,193 @@
+import contextlib
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Union
+
+from logs import get_logger
+
+# Latency buckets (seconds) wide enough for a JWKS hit up to a full crew run.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "crewai-calendar-contacts")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, ...], list] = {}  # key → [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        for key, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {bucket_count}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+
+StatsSource = Callable[[], Union[dict, list]]
+
+
+class Registry:
+    """Minimal Prometheus registry: counters, histograms and stats() gauges."""
+
+    def __init__(self):
+        self._metrics: list = []
+        self._stats: list[tuple[str, str, StatsSource, Optional[str]]] = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, help: str, source: StatsSource, label: Optional[str] = None) -> None:
+        """Expose a component's ``stats()`` as gauges named ``<prefix>_<key>``.
+
+        ``source`` returns a dict of numbers, or a list of such dicts keyed by
+        ``label`` (e.g. one dict per connection-pool host).
+        """
+        self._stats.append((prefix, help, source, label))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, help, source, label in self._stats:
+            try:
+                data = source()
+            except Exception:
+                continue
+            rows = data if isinstance(data, list) else [data]
+            gauges: dict[str, list[str]] = {}
+            for row in rows:
+                labels = _format_labels((label,), (row.get(label, ""),)) if label else ""
+                for key, value in row.items():
+                    if key == label or isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    gauges.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{labels} {value}")
+            for name, samples in gauges.items():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "crew_stage_duration_seconds",
+    "Time spent per request stage (token verification, key lookup, outbound token, Google, LLM, crew).",
+    ("stage", "outcome"),
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "crew_llm_fallbacks_total",
+    "LLM calls retried on the next model of the agent's llm_profile fallbacks.",
+    ("model", "reason"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "crew_llm_tokens_total",
+    "Tokens reported by litellm.completion responses (prompt, completion, cache_read, cache_write).",
+    ("model", "kind"),
+)
+
+
+def _init_tracer():
+    """OpenTelemetry export is optional: on when OTEL_EXPORTER_OTLP_ENDPOINT is set."""
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        get_logger("metrics").warning(
+            "OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk / "
+            "opentelemetry-exporter-otlp are not installed; spans are not exported"
+        )
+        return None
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    return trace.get_tracer("descope_agentic_crew")
+
+
+_tracer = _init_tracer()
+
+
+@contextlib.contextmanager
+def span(stage: str, **attributes):
+    """Time a stage into crew_stage_duration_seconds (and an OTel span if enabled)."""
+    otel = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer else contextlib.nullcontext()
+    started = time.perf_counter()
+    outcome = "ok"
+    with otel:
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, outcome=outcome)
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from typing import Optional
+
+
+class ProgressReporter:
+    """Forwards crew/tool milestones to the MCP client while run_crew executes.
+
+    ``emit`` may be called from any thread (crews and tools run on worker
+    threads); notifications are scheduled onto the request's event loop and
+    sent over the session's stream for this request. Clients that passed a
+    progressToken get progress notifications, others get log messages.
+    Anything passed as ``partial`` is kept so it can still be returned if a
+    later stage fails.
+    """
+
+    def __init__(self, session=None, request_id=None, progress_token=None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._session = session
+        self._request_id = request_id
+        self._progress_token = progress_token
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._step = 0
+        self.partials: list[str] = []
+        self.tool_errors = 0
+
+    @classmethod
+    def from_request_context(cls, ctx) -> "ProgressReporter":
+        meta = getattr(ctx, "meta", None)
+        return cls(
+            session=ctx.session,
+            request_id=ctx.request_id,
+            progress_token=getattr(meta, "progressToken", None),
+            loop=asyncio.get_running_loop(),
+        )
+
+    def emit(self, message: str, partial: Optional[str] = None) -> None:
+        with self._lock:
+            self._step += 1
+            step = self._step
+            if partial:
+                self.partials.append(partial)
+        if self._session is None or self._loop is None or self._loop.is_closed():
+            return
+        coro = self._send(step, message)
+        if threading.get_ident() == self._loop_thread:
+            self._loop.create_task(coro)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def tool_error(self) -> None:
+        """A tool returned an error; the run's result must not be replayed to retries."""
+        with self._lock:
+            self.tool_errors += 1
+
+    async def _send(self, step: int, message: str) -> None:
+        try:
+            if self._progress_token is not None:
+                await self._session.send_progress_notification(
+                    self._progress_token, step, message=message,
+                    related_request_id=self._request_id,
+                )
+            else:
+                await self._session.send_log_message(
+                    "info", message, logger="run_crew", related_request_id=self._request_id,
+                )
+        except Exception:
+            # The client may have gone away; progress is best-effort.
+            pass
@@ -0,0 +1,167 @@
+import contextlib
+import os
+import threading
+import time
+from typing import Optional
+
+# Consecutive failures (connection errors, timeouts, 5xx) that open a
+# dependency's breaker, and how long it then fails fast before letting a
+# single trial call through.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_DISPLAY_NAMES = {
+    "descope": "Descope",
+    "descope-jwks": "Descope JWKS",
+    "google-calendar": "Google Calendar",
+    "google-people": "Google Contacts",
+    "google": "Google APIs",
+}
+
+
+class CircuitOpen(Exception):
+    """A dependency's breaker is open: the call was refused without being made."""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(
+            f"{_DISPLAY_NAMES.get(name, name)} is temporarily unavailable (repeated failures); "
+            f"not retrying for another {max(retry_in, 1):.0f}s"
+        )
+
+
+def is_failure_status(status: int) -> bool:
+    """Statuses that say the dependency is unhealthy, not that the request was wrong."""
+    return status >= 500
+
+
+def is_neutral_status(status: int) -> bool:
+    # Google 429s are mostly one user's quota; counting them would let one
+    # user's retry loop open a process-wide breaker for everyone.
+    return status == 429
+
+
+class _Outcome:
+    status: Optional[int] = None
+
+
+class CircuitBreaker:
+    """Fails calls to one dependency fast while it is down.
+
+    Closed: calls go through and consecutive failures are counted. After
+    ``failure_threshold`` of them the breaker opens and every call raises
+    ``CircuitOpen`` for ``reset_timeout`` seconds. Then one trial call is let
+    through (half-open): success closes the breaker, failure reopens it.
+    Thread-safe.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.opens = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may be made now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self._opened_at + self._reset_timeout - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpen(self.name, retry_in)
+
+    @contextlib.contextmanager
+    def guard(self, failures: tuple = (OSError,)):
+        """Wrap one call: refused while open, and its outcome recorded.
+
+        Exceptions in ``failures`` (transport errors) count against the
+        dependency; set ``.status`` on the yielded outcome to have the HTTP
+        status judged too. Anything else (e.g. a request deadline) leaves the
+        breaker as it was.
+        """
+        self.before_call()
+        outcome = _Outcome()
+        try:
+            yield outcome
+        except failures:
+            self.record_failure()
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        if outcome.status is None:
+            self.record_success()
+        else:
+            self.record_status(outcome.status)
+
+    def _release_trial(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self.state = CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self._failures >= self._failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def record_status(self, status: int) -> None:
+        if is_neutral_status(status):
+            self._release_trial()
+        elif is_failure_status(status):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "dependency": self.name,
+                "state": _STATE_VALUES[self.state],
+                "consecutive_failures": self._failures,
+                "opens": self.opens,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for a dependency (created on first use)."""
+    found: Optional[CircuitBreaker] = _breakers.get(name)
+    if found is not None:
+        return found
+    with _breakers_lock:
+        return _breakers.setdefault(name, CircuitBreaker(name))
+
+
+def breaker_stats() -> list[dict]:
+    """Breaker state per dependency: 0 closed, 1 half-open, 2 open."""
+    return [b.stats() for b in list(_breakers.values())]
@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# Paths a run_crew request can take, cheapest first.
+CONTACTS_LOOKUP = "contacts_lookup"        # GoogleContactsTool directly, no LLM
+CONTACTS_AGENT = "contacts_agent"          # contacts task only
+CALENDAR_ONLY = "calendar_only"            # calendar task only (no invitee to look up)
+CALENDAR_WITH_CONTACTS = "calendar_with_contacts"  # full two-task crew
+
+# "auto" plans only for the full two-task crew; "always"/"never" force it.
+CREW_PLANNING = os.getenv("CREW_PLANNING", "auto").lower()
+
+_CALENDAR_WORDS = re.compile(
+    r"\b(schedule|reschedule|meeting|meet|event|calendar|appointment|book|set up|invite|"
+    r"remind(?:er)?|lunch|dinner|breakfast|coffee|call|sync|standup|1:1|one-on-one|"
+    r"tomorrow|today|tonight|next (?:week|monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b",
+    re.IGNORECASE,
+)
+_CONTACT_WORDS = re.compile(r"\b(contacts?|email|e-mail|phone|number|address)\b", re.IGNORECASE)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_LOOKUP_PATTERNS = [
+    # "search my contacts for Alice", "look in my contacts for Alice Smith"
+    re.compile(r"\b(?:search|look(?:\s+up)?|find)\s+(?:in\s+|through\s+)?my\s+contacts\s+for\s+(?P<q>.+)$", re.IGNORECASE),
+    # "find the contact info for Alice", "look up the phone number of Bob"
+    re.compile(
+        r"\b(?:find|look\s*up|get|show(?:\s+me)?|search\s+for)\s+(?:the\s+)?"
+        r"(?:contact(?:\s+info(?:rmation)?|\s+details)?|email(?:\s+address)?|phone(?:\s+number)?|number)\s+"
+        r"(?:for|of)\s+(?P<q>.+)$",
+        re.IGNORECASE,
+    ),
+    # "what's Alice's email", "find Bob's phone number"
+    re.compile(
+        r"\b(?:what(?:'s|\s+is)|find|look\s*up|get|show(?:\s+me)?)\s+(?P<q>.+?)'s\s+"
+        r"(?:email|e-mail|phone|number|contact|details|address)",
+        re.IGNORECASE,
+    ),
+    # "find Alice in my contacts", "look up Alice in contacts"
+    re.compile(r"\b(?:find|look\s*up|search\s+for)\s+(?P<q>.+?)\s+in\s+(?:my\s+)?contacts\b", re.IGNORECASE),
+]
+# After "with"/"w/"/"invite"/"including" any word but a date or "me" is an invitee
+# to resolve, in any case ("with alice", "with my manager"). "and"/"to" are too
+# common to trust on their own, so they only count before a capitalised name.
+_INVITEE = re.compile(
+    r"(?:\b(?i:with|invite|inviting|including)\s+(?:(?i:to|for)\s+)?|\b(?i:w/)\s*)"
+    r"(?P<who>[\w.+-]+@[\w-]+(?:\.[\w-]+)+|[\w'-]+(?:\s+[A-Z][\w'-]+)?)"
+)
+_NAMED_INVITEE = re.compile(r"\b(?:[Aa]nd|[Tt]o)\s+(?P<who>[A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)?)")
+# "for"/"call"/"meet" are followed by a person about as often as not
+# ("call bob", "for priya" vs "call at 3", "for lunch").
+_MAYBE_INVITEE = re.compile(r"\b(?i:for|call|meet|ping|see|visit)\s+(?P<who>[\w'-]+)")
+_CAPITALISED = re.compile(r"\b[A-Z][\w'-]*")
+_NOT_NAMES = {"monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+              "january", "february", "march", "april", "may", "june", "july", "august",
+              "september", "october", "november", "december", "today", "tomorrow", "tonight",
+              "this", "next", "noon", "google", "zoom", "meet", "i", "me", "myself",
+              "am", "pm", "pt", "pst", "pdt", "et", "est", "edt", "utc", "gmt"}
+_NOT_INVITEES = _NOT_NAMES | {
+    "a", "an", "the", "my", "our", "us", "it", "at", "on", "in", "from", "to", "with", "and", "by", "up",
+    "back", "about", "all", "every",
+    "lunch", "dinner", "breakfast", "coffee", "time", "focus", "minutes", "mins", "hour", "hours",
+    "day", "week", "month", "morning", "afternoon", "evening", "later", "now",
+}
+
+
+@dataclass(frozen=True)
+class Route:
+    path: str
+    planning: bool
+    contact_query: Optional[str] = None
+
+    @property
+    def include_contacts(self) -> bool:
+        return self.path in (CONTACTS_AGENT, CALENDAR_WITH_CONTACTS)
+
+    @property
+    def include_calendar(self) -> bool:
+        return self.path in (CALENDAR_ONLY, CALENDAR_WITH_CONTACTS)
+
+
+_counts: Counter = Counter()
+_counts_lock = threading.Lock()
+
+
+def _clean_query(text: str) -> str:
+    return text.strip().strip("\"'").rstrip("?.! ").strip()
+
+
+def _plan(path: str, planning: Optional[bool]) -> bool:
+    if path == CONTACTS_LOOKUP:
+        return False
+    if planning is not None:
+        return planning
+    if CREW_PLANNING == "always":
+        return True
+    if CREW_PLANNING == "never":
+        return False
+    return path == CALENDAR_WITH_CONTACTS
+
+
+def _invitees(text: str) -> list[str]:
+    """Everything in a calendar request that may be a person to look up.
+
+    Empty only when nothing is: no invitee cue, no name-like word after
+    "for"/"call"/..., and no capitalised word that isn't a date or starts a
+    sentence. Literal email addresses need no lookup.
+    """
+    names = [m.group("who") for pattern in (_INVITEE, _NAMED_INVITEE) for m in pattern.finditer(text)
+             if not _EMAIL.fullmatch(m.group("who")) and m.group("who").split()[0].lower() not in _NOT_NAMES]
+    names += [m.group("who") for m in _MAYBE_INVITEE.finditer(text)
+              if m.group("who").lower() not in _NOT_INVITEES and not m.group("who")[0].isdigit()]
+    plain = _EMAIL.sub("", text)
+    for m in _CAPITALISED.finditer(plain):
+        before = plain[:m.start()].rstrip()
+        word = m.group().lower()
+        if before and before[-1] not in ".!?:" and word not in _NOT_NAMES and not _CALENDAR_WORDS.fullmatch(word):
+            names.append(m.group())
+    return names
+
+
+def classify(user_request: str, planning: Optional[bool] = None) -> Route:
+    """Pick the cheapest path that can satisfy the request.
+
+    Anything the heuristics aren't sure about goes to the full crew, which is
+    what every request used to get.
+    """
+    text = user_request.strip()
+    has_calendar = bool(_CALENDAR_WORDS.search(text))
+
+    if not has_calendar:
+        for pattern in _LOOKUP_PATTERNS:
+            match = pattern.search(text)
+            if match and _clean_query(match.group("q")):
+                path, query = CONTACTS_LOOKUP, _clean_query(match.group("q"))
+                break
+        else:
+            path, query = (CONTACTS_AGENT if _CONTACT_WORDS.search(text) else CALENDAR_WITH_CONTACTS), None
+    else:
+        names = _invitees(text)
+        if names or _CONTACT_WORDS.search(_EMAIL.sub("", text)):
+            path, query = CALENDAR_WITH_CONTACTS, (names[0] if names else None)
+        else:
+            path, query = CALENDAR_ONLY, None
+
+    route = Route(path=path, planning=_plan(path, planning), contact_query=query)
+    with _counts_lock:
+        _counts[route.path] += 1
+    return route
+
+
+def route_stats() -> dict:
+    with _counts_lock:
+        return dict(_counts)
@@ -0,0 +1,186 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from logs import get_logger
+
+# memory:// | sqlite:///path/to/store.db | redis://host:6379/0 (any RESP server
+# that supports GET, SET EX and DEL). Unset means every worker keeps its own caches.
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "")
+SESSION_STORE_PREFIX = os.getenv("SESSION_STORE_PREFIX", "descope-crew:")
+SESSION_STORE_TIMEOUT = float(os.getenv("SESSION_STORE_TIMEOUT", "0.5"))
+
+logger = get_logger("session_store")
+
+
+class SessionStore(ABC):
+    """Key/value store with per-key TTL shared by every worker process.
+
+    It backs the per-process caches as a second level, so a token or JWKS
+    fetched by one worker is reused by the others. Store failures are logged
+    and treated as misses; the caller then falls back to the origin.
+    """
+
+    def __init__(self, prefix: str = SESSION_STORE_PREFIX):
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    def _delete(self, key: str) -> None: ...
+
+    def get_json(self, key: str) -> Any:
+        try:
+            raw = self._get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Session store get failed: %s", e)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set_json(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        try:
+            self._set(self.prefix + key, json.dumps(value).encode(), ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Session store set failed: %s", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._delete(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Session store delete failed: %s", e)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class MemoryStore(SessionStore):
+    """In-process store; only shared by threads of a single worker."""
+
+    def __init__(self, prefix: str = SESSION_STORE_PREFIX):
+        super().__init__(prefix)
+        self._entries: dict[str, tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() >= entry[1]:
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteStore(SessionStore):
+    """File-backed store for several workers on one host (WAL mode)."""
+
+    _PURGE_EVERY = 500  # sets between sweeps of expired rows
+
+    def __init__(self, path: str, prefix: str = SESSION_STORE_PREFIX):
+        super().__init__(prefix)
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SESSION_STORE_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl)
+        )
+        self._sets += 1
+        if self._sets % self._PURGE_EVERY == 0:
+            conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+
+    def _delete(self, key):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+
+class RedisStore(SessionStore):
+    """Store on Redis or any server speaking its protocol (GET, SET EX, DEL)."""
+
+    def __init__(self, url: str, prefix: str = SESSION_STORE_PREFIX):
+        super().__init__(prefix)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE_URL is a redis:// URL but the redis package is not installed") from e
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=SESSION_STORE_TIMEOUT, socket_connect_timeout=SESSION_STORE_TIMEOUT
+        )
+
+    def _get(self, key):
+        return self._client.get(key)
+
+    def _set(self, key, value, ttl):
+        self._client.set(key, value, ex=max(1, math.ceil(ttl)))
+
+    def _delete(self, key):
+        self._client.delete(key)
+
+
+def open_store(url: str) -> Optional[SessionStore]:
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryStore()
+    if scheme == "sqlite":
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteStore(url[len("sqlite:///"):])
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported SESSION_STORE_URL scheme: {scheme!r}")
+
+
+shared_store = open_store(SESSION_STORE_URL)
@@ -0,0 +1,240 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+CALENDAR_MAX_USERS = int(os.getenv("CALENDAR_MAX_USERS", "256"))
+CALENDAR_IDLE_TTL = float(os.getenv("CALENDAR_IDLE_TTL", "3600"))
+# Availability checks within this many seconds of the last sync are answered
+# from memory without calling the Calendar API.
+CALENDAR_SYNC_INTERVAL = float(os.getenv("CALENDAR_SYNC_INTERVAL", "30"))
+# Only events overlapping [now - 1 day, now + horizon] are indexed.
+CALENDAR_HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "365"))
+
+
+def parse_time(value: str, tz: ZoneInfo) -> float:
+    """ISO 8601 date-time (or bare date) to epoch seconds; naive values are in ``tz``."""
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), datetime.min.time(), tz).timestamp()
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed.timestamp()
+
+
+def _blocks_time(event: dict) -> bool:
+    if event.get("status") == "cancelled" or event.get("transparency") == "transparent":
+        return False
+    for attendee in event.get("attendees", []):
+        if attendee.get("self") and attendee.get("responseStatus") == "declined":
+            return False
+    return True
+
+
+def _event_bounds(event: dict, tz: ZoneInfo) -> Optional[tuple[float, float]]:
+    start, end = event.get("start") or {}, event.get("end") or {}
+    start_value = start.get("dateTime") or start.get("date")
+    end_value = end.get("dateTime") or end.get("date") or start_value
+    if not start_value:
+        return None
+    return parse_time(start_value, tz), parse_time(end_value, tz)
+
+
+class _UserCalendar:
+    """One user's busy intervals, sorted by start for overlap queries."""
+
+    def __init__(self):
+        self.events: dict[str, tuple[float, float, str]] = {}  # id → (start, end, summary)
+        self.sync_token: Optional[str] = None
+        self.synced_at = 0.0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._starts: list[float] = []
+        self._intervals: list[tuple[float, float, str, str]] = []  # (start, end, id, summary)
+        self._max_duration = 0.0
+
+    def apply(self, event: dict, tz: ZoneInfo, window: tuple[float, float]) -> None:
+        event_id = event.get("id")
+        if not event_id:
+            return
+        bounds = _event_bounds(event, tz) if _blocks_time(event) else None
+        if bounds is None or bounds[1] <= window[0] or bounds[0] >= window[1]:
+            self.events.pop(event_id, None)
+        else:
+            self.events[event_id] = (bounds[0], bounds[1], event.get("summary", "(no title)"))
+
+    def rebuild_index(self) -> None:
+        intervals = sorted((s, e, eid, summary) for eid, (s, e, summary) in self.events.items())
+        # Swap in whole objects so concurrent readers never see a partial index.
+        self._max_duration = max((e - s for s, e, _, _ in intervals), default=0.0)
+        self._intervals, self._starts = intervals, [i[0] for i in intervals]
+
+    def overlapping(self, start: float, end: float) -> list[tuple[float, float, str, str]]:
+        """Events overlapping [start, end).
+
+        Nothing starting before ``start - max_duration`` can reach ``start``,
+        so only the slice between that bound and ``end`` is scanned.
+        """
+        intervals, starts = self._intervals, self._starts
+        lo = bisect.bisect_left(starts, start - self._max_duration)
+        hi = bisect.bisect_left(starts, end)
+        return [i for i in intervals[lo:hi] if i[1] > start]
+
+
+def merge_busy(intervals: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    merged: list[list[float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def free_slots(busy: list[tuple[float, float]], windows: list[tuple[float, float]],
+               duration: float, limit: int) -> list[tuple[float, float]]:
+    """The first ``limit`` gaps of at least ``duration`` inside ``windows``."""
+    busy = merge_busy(busy)
+    slots = []
+    for window_start, window_end in windows:
+        cursor = window_start
+        i = bisect.bisect_left(busy, (window_start,))
+        if i > 0 and busy[i - 1][1] > cursor:
+            cursor = busy[i - 1][1]
+        while cursor + duration <= window_end:
+            if i < len(busy) and busy[i][0] < cursor + duration:
+                cursor = max(cursor, busy[i][1])
+                i += 1
+                continue
+            slots.append((cursor, cursor + duration))
+            if len(slots) >= limit:
+                return slots
+            cursor += duration
+    return slots
+
+
+class CalendarStore:
+    """Per-user primary-calendar cache kept current with Calendar sync tokens.
+
+    ``list_page(**params)`` must call ``events.list`` on the user's primary
+    calendar with ``singleEvents=True`` (so recurring meetings arrive as
+    instances) and return the decoded response; the store adds paging and
+    ``syncToken``.
+    """
+
+    def __init__(self, tz: str = "America/Los_Angeles", max_users: int = CALENDAR_MAX_USERS,
+                 idle_ttl: float = CALENDAR_IDLE_TTL, sync_interval: float = CALENDAR_SYNC_INTERVAL,
+                 horizon_days: int = CALENDAR_HORIZON_DAYS):
+        self.tz = ZoneInfo(tz)
+        self._max_users = max_users
+        self._idle_ttl = idle_ttl
+        self._sync_interval = sync_interval
+        self._horizon = horizon_days * 86400
+        self._lock = threading.Lock()
+        self._users: OrderedDict[str, _UserCalendar] = OrderedDict()
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.evictions = 0
+
+    def busy(self, user_id: str, list_page: Callable[..., dict],
+             start: float, end: float) -> list[tuple[float, float, str, str]]:
+        """The user's events overlapping [start, end), synced first if stale."""
+        return self._calendar(user_id, list_page).overlapping(start, end)
+
+    def _calendar(self, user_id: str, list_page: Callable[..., dict]) -> _UserCalendar:
+        entry = self._entry(user_id)
+        with entry.lock:
+            if time.monotonic() - entry.synced_at >= self._sync_interval:
+                self._sync(entry, list_page)
+        return entry
+
+    def _entry(self, user_id: str) -> _UserCalendar:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = _UserCalendar()
+            self._users.move_to_end(user_id)
+            entry.last_used = now
+            while len(self._users) > self._max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+            for uid in list(self._users):
+                if now - self._users[uid].last_used < self._idle_ttl:
+                    break
+                del self._users[uid]
+                self.evictions += 1
+            return entry
+
+    def _sync(self, entry: _UserCalendar, list_page: Callable[..., dict]) -> None:
+        now = time.time()
+        window = (now - 86400, now + self._horizon)
+        if entry.sync_token:
+            try:
+                changed, token = self._fetch_all(list_page, syncToken=entry.sync_token)
+            except HttpError as error:
+                # 410 Gone: the sync token expired; start over with a full sync.
+                if error.resp.status != 410:
+                    raise
+            else:
+                for event in changed:
+                    entry.apply(event, self.tz, window)
+                self.incremental_syncs += 1
+                self._finish_sync(entry, token, changed=bool(changed))
+                return
+
+        events, token = self._fetch_all(list_page)
+        entry.events = {}
+        for event in events:
+            entry.apply(event, self.tz, window)
+        self.full_syncs += 1
+        self._finish_sync(entry, token, changed=True)
+
+    @staticmethod
+    def _finish_sync(entry: _UserCalendar, token: Optional[str], changed: bool) -> None:
+        entry.sync_token = token
+        entry.synced_at = time.monotonic()
+        if changed:
+            entry.rebuild_index()
+
+    @staticmethod
+    def _fetch_all(list_page: Callable[..., dict], **params) -> tuple[list[dict], Optional[str]]:
+        events = []
+        page_token = None
+        while True:
+            response = list_page(pageToken=page_token, **params)
+            events.extend(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return events, response.get("nextSyncToken")
+
+    def working_windows(self, start: float, end: float, workday: tuple[int, int]) -> list[tuple[float, float]]:
+        """[start, end) clipped to working hours on weekdays, in the store's timezone."""
+        windows = []
+        day = datetime.fromtimestamp(start, self.tz).date()
+        last = datetime.fromtimestamp(end, self.tz).date()
+        while day <= last:
+            if day.weekday() < 5:
+                open_at = datetime.combine(day, datetime.min.time(), self.tz) + timedelta(hours=workday[0])
+                close_at = datetime.combine(day, datetime.min.time(), self.tz) + timedelta(hours=workday[1])
+                lo, hi = max(start, open_at.timestamp()), min(end, close_at.timestamp())
+                if lo < hi:
+                    windows.append((lo, hi))
+            day += timedelta(days=1)
+        return windows
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "events": sum(len(e.events) for e in self._users.values()),
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,350 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from googleapiclient.errors import HttpError
+
+# Only what search and the default result line need; phone numbers and
+# addresses are fetched per result with people.getBatchGet when asked for.
+PERSON_FIELDS = "names,emailAddresses,organizations"
+
+CONTACTS_MAX_USERS = int(os.getenv("CONTACTS_MAX_USERS", "256"))
+CONTACTS_IDLE_TTL = float(os.getenv("CONTACTS_IDLE_TTL", "3600"))
+# Searches within this many seconds of the last sync are answered without
+# touching the People API at all.
+CONTACTS_SYNC_INTERVAL = float(os.getenv("CONTACTS_SYNC_INTERVAL", "30"))
+# Optional: persist each user's contacts and sync token so a restart resumes
+# with an incremental sync. Snapshots contain contact PII — point this at a
+# private directory.
+CONTACTS_SNAPSHOT_DIR = os.getenv("CONTACTS_SNAPSHOT_DIR")
+
+_WORD_SPLIT = re.compile(r"[\s@._\-+,]+")
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents so "José" matches "jose"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def _searchable_values(person: dict) -> list[str]:
+    values = []
+    for name in person.get("names", []):
+        values.extend(name.get(f, "") for f in ("displayName", "givenName", "familyName"))
+    values.extend(email.get("value", "") for email in person.get("emailAddresses", []))
+    values.extend(org.get("name", "") for org in person.get("organizations", []))
+    return [v for v in (normalize(v) for v in values) if v]
+
+
+def _sort_key(person: dict) -> str:
+    names = person.get("names") or [{}]
+    return normalize(names[0].get("displayName", ""))
+
+
+def _name_tier(person: dict, q: str) -> int:
+    """0: full name match, 1: name starts with the query, 2: a name word matches, 3: other."""
+    best = 3
+    for name in person.get("names", []):
+        display = normalize(name.get("displayName", ""))
+        if display == q:
+            return 0
+        if display.startswith(q):
+            best = min(best, 1)
+        elif q in (normalize(name.get(f, "")) for f in ("givenName", "familyName")):
+            best = min(best, 2)
+    return best
+
+
+def rank(people: list[dict], query: Optional[str], required: tuple[str, ...] = ()) -> list[dict]:
+    """Best matches first.
+
+    Name matches rank before email/org matches and, within a tier, contacts
+    that have the ``required`` person fields (e.g. ``emailAddresses`` for an
+    invite) before ones that don't. Ties keep the store's order.
+    """
+    q = normalize(query or "")
+    if not q and not required:
+        return people
+    return sorted(people, key=lambda p: (_name_tier(p, q) if q else 0, sum(not p.get(f) for f in required)))
+
+
+class _UserContacts:
+    """One user's contacts plus the prefix/substring index over them."""
+
+    def __init__(self):
+        self.people: dict[str, dict] = {}
+        self.sync_token: Optional[str] = None
+        self.synced_at = 0.0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self._order: list[str] = []
+        self._terms: list[tuple[str, str]] = []  # sorted (term, resourceName)
+        # All searchable values in display order, one "\x01"-separated record
+        # per contact, so a substring scan is a handful of str.find calls.
+        self._blob = ""
+        self._starts: list[int] = []  # offset of each record in _blob
+        self._blob_owners: list[str] = []  # resourceName of each record
+
+    def rebuild_index(self) -> None:
+        terms = set()
+        records = []
+        order = sorted(self.people, key=lambda rn: _sort_key(self.people[rn]))
+        for rn in order:
+            values = _searchable_values(self.people[rn])
+            for value in values:
+                terms.add((value, rn))
+                for word in _WORD_SPLIT.split(value):
+                    if word:
+                        terms.add((word, rn))
+            records.append("\x00".join(values))
+        starts, offset = [], 0
+        for record in records:
+            starts.append(offset)
+            offset += len(record) + 1
+        # Swap in whole objects so concurrent readers never see a partial index.
+        self._order, self._terms = order, sorted(terms)
+        self._blob, self._starts, self._blob_owners = "\x01".join(records), starts, order
+
+    def search(self, query: Optional[str], limit: int) -> list[dict]:
+        order, terms = self._order, self._terms
+        blob, starts, owners = self._blob, self._starts, self._blob_owners
+        q = normalize(query or "")
+        if not q:
+            found = order[:limit]
+            return [self.people[rn] for rn in found if rn in self.people]
+
+        # Exact and prefix matches on a name/email/org or one of its words rank
+        # first; plain substring matches (the previous behaviour) fill the rest.
+        exact, prefix = [], []
+        i = bisect.bisect_left(terms, (q, ""))
+        while i < len(terms) and terms[i][0].startswith(q):
+            term, rn = terms[i]
+            (exact if term == q else prefix).append(rn)
+            i += 1
+        found = list(dict.fromkeys(exact + prefix))
+        if len(found) < limit:
+            seen = set(found)
+            pos = blob.find(q)
+            while pos != -1 and len(found) < limit:
+                record = bisect.bisect_right(starts, pos) - 1
+                rn = owners[record]
+                if rn not in seen:
+                    seen.add(rn)
+                    found.append(rn)
+                if record + 1 >= len(starts):
+                    break
+                pos = blob.find(q, starts[record + 1])
+        return [self.people[rn] for rn in found[:limit] if rn in self.people]
+
+
+def _sync_token_expired(error: HttpError) -> bool:
+    # Sync tokens expire after 7 days (EXPIRED_SYNC_TOKEN); the caller falls
+    # back to a full listing.
+    return error.resp.status in (400, 410)
+
+
+async def _acquire(lock: threading.Lock) -> None:
+    """Take a lock shared with crew threads without blocking the event loop.
+
+    The acquire runs on a worker thread and can't be interrupted, so if the
+    caller is cancelled meanwhile the lock is released as soon as it is taken.
+    """
+    acquire = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        acquire.add_done_callback(lambda done: done.exception() is None and lock.release())
+        raise
+
+
+class ContactsStore:
+    """Per-user contacts cache kept current with People API sync tokens.
+
+    ``list_page(**params)`` must call ``people.connections.list`` for the user
+    with ``PERSON_FIELDS`` and return the decoded response; the store adds the
+    paging and ``requestSyncToken``/``syncToken`` parameters. Incremental calls
+    ask for a sync token too, or the People API returns none and the next
+    search falls back to a full listing.
+    """
+
+    def __init__(self, max_users: int = CONTACTS_MAX_USERS, idle_ttl: float = CONTACTS_IDLE_TTL,
+                 sync_interval: float = CONTACTS_SYNC_INTERVAL,
+                 snapshot_dir: Optional[str] = CONTACTS_SNAPSHOT_DIR):
+        self._max_users = max_users
+        self._idle_ttl = idle_ttl
+        self._sync_interval = sync_interval
+        self._snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._users: OrderedDict[str, _UserContacts] = OrderedDict()
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.evictions = 0
+
+    def search(self, user_id: str, list_page: Callable[..., dict],
+               query: Optional[str], max_results: int) -> list[dict]:
+        entry = self._entry(user_id)
+        with entry.lock:
+            if time.monotonic() - entry.synced_at >= self._sync_interval:
+                self._sync(user_id, entry, list_page)
+        return entry.search(query, max_results)
+
+    def _entry(self, user_id: str) -> _UserContacts:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = self._load_snapshot(user_id)
+            self._users.move_to_end(user_id)
+            entry.last_used = now
+            while len(self._users) > self._max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+            # Least recently used users sit at the front; drop the idle ones.
+            for uid in list(self._users):
+                if now - self._users[uid].last_used < self._idle_ttl:
+                    break
+                del self._users[uid]
+                self.evictions += 1
+            return entry
+
+    async def asearch(self, user_id: str, alist_page: Callable[..., Awaitable[dict]],
+                      query: Optional[str], max_results: int) -> list[dict]:
+        """``search`` for the event loop, with an async ``alist_page``."""
+        entry = self._entry(user_id)
+        if time.monotonic() - entry.synced_at >= self._sync_interval:
+            await _acquire(entry.lock)
+            try:
+                if time.monotonic() - entry.synced_at >= self._sync_interval:
+                    await self._async_sync(user_id, entry, alist_page)
+            finally:
+                entry.lock.release()
+        return entry.search(query, max_results)
+
+    def _sync(self, user_id: str, entry: _UserContacts, list_page: Callable[..., dict]) -> None:
+        if entry.sync_token:
+            try:
+                changed, token = self._fetch_all(list_page, requestSyncToken=True,
+                                                 syncToken=entry.sync_token)
+            except HttpError as error:
+                if not _sync_token_expired(error):
+                    raise
+            else:
+                self._apply_changes(user_id, entry, changed, token)
+                return
+
+        people, token = self._fetch_all(list_page, requestSyncToken=True)
+        self._apply_full(user_id, entry, people, token)
+
+    async def _async_sync(self, user_id: str, entry: _UserContacts, alist_page: Callable[..., Awaitable[dict]]) -> None:
+        if entry.sync_token:
+            try:
+                changed, token = await self._afetch_all(alist_page, requestSyncToken=True,
+                                                        syncToken=entry.sync_token)
+            except HttpError as error:
+                if not _sync_token_expired(error):
+                    raise
+            else:
+                self._apply_changes(user_id, entry, changed, token)
+                return
+
+        people, token = await self._afetch_all(alist_page, requestSyncToken=True)
+        self._apply_full(user_id, entry, people, token)
+
+    def _apply_changes(self, user_id: str, entry: _UserContacts, changed: list[dict], token: Optional[str]) -> None:
+        for person in changed:
+            rn = person.get("resourceName")
+            if person.get("metadata", {}).get("deleted"):
+                entry.people.pop(rn, None)
+            elif rn:
+                entry.people[rn] = person
+        self.incremental_syncs += 1
+        self._finish_sync(user_id, entry, token, changed=bool(changed))
+
+    def _apply_full(self, user_id: str, entry: _UserContacts, people: list[dict], token: Optional[str]) -> None:
+        entry.people = {p["resourceName"]: p for p in people if p.get("resourceName")}
+        self.full_syncs += 1
+        self._finish_sync(user_id, entry, token, changed=True)
+
+    def _finish_sync(self, user_id: str, entry: _UserContacts, token: Optional[str], changed: bool) -> None:
+        entry.sync_token = token
+        entry.synced_at = time.monotonic()
+        if changed:
+            entry.rebuild_index()
+            self._save_snapshot(user_id, entry)
+
+    @staticmethod
+    def _fetch_all(list_page: Callable[..., dict], **params) -> tuple[list[dict], Optional[str]]:
+        people = []
+        page_token = None
+        while True:
+            response = list_page(pageToken=page_token, **params)
+            people.extend(response.get("connections", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return people, response.get("nextSyncToken")
+
+    @staticmethod
+    async def _afetch_all(alist_page: Callable[..., Awaitable[dict]], **params) -> tuple[list[dict], Optional[str]]:
+        people = []
+        page_token = None
+        while True:
+            response = await alist_page(pageToken=page_token, **params)
+            people.extend(response.get("connections", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return people, response.get("nextSyncToken")
+
+    def _snapshot_path(self, user_id: str) -> Optional[str]:
+        if not self._snapshot_dir:
+            return None
+        digest = hashlib.sha256(user_id.encode()).hexdigest()
+        return os.path.join(self._snapshot_dir, f"contacts-{digest}.json")
+
+    def _load_snapshot(self, user_id: str) -> _UserContacts:
+        entry = _UserContacts()
+        path = self._snapshot_path(user_id)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                # A sync token only continues a listing with the same personFields.
+                if data.get("personFields") != PERSON_FIELDS:
+                    return entry
+                entry.people = {p["resourceName"]: p for p in data.get("people", [])}
+                entry.sync_token = data.get("syncToken")
+                entry.rebuild_index()
+            except (OSError, ValueError, KeyError):
+                entry = _UserContacts()
+        return entry
+
+    def _save_snapshot(self, user_id: str, entry: _UserContacts) -> None:
+        path = self._snapshot_path(user_id)
+        if not path:
+            return
+        try:
+            os.makedirs(self._snapshot_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"personFields": PERSON_FIELDS, "syncToken": entry.sync_token,
+                           "people": list(entry.people.values())}, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass  # the in-memory index is still valid; the next sync retries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "contacts": sum(len(e.people) for e in self._users.values()),
+                "full_syncs": self.full_syncs,
+                "incremental_syncs": self.incremental_syncs,
+                "evictions": self.evictions,
+            }
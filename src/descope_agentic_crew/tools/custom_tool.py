@@ -1,19 +1,46 @@
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type, Optional, List
-import requests
-import json
+from typing import Any, Literal, Type, Optional, List
+import asyncio
+import base64
+from datetime import datetime
+import functools
+import hashlib
 import os
-from google.oauth2 import credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-
-
-def get_outbound_token(app_id, user_id, access_token):
-    """Fetch Google token from Descope Connections vault using the MCP access token."""
+from tools.token_cache import OutboundTokenCache
+from tools.calendar_index import CalendarStore, free_slots, parse_time
+from tools.contacts_index import PERSON_FIELDS, ContactsStore, rank
+from tools.google_services import execute_async, google_service, user_http
+from tools.tool_output import CONTACT_FIELDS, DEFAULT_CONTACT_FIELDS, contact_fields, fit_budget, format_contact
+from deadline import DeadlineExceeded, check, deadline_scope
+from logs import get_logger
+from metrics import span
+from session_store import shared_store
+from resilience import CircuitOpen, breaker
+from transport import (
+    ASYNC_TRANSPORT_ERRORS, SYNC_TRANSPORT_ERRORS, async_http_client, async_request_timeout, deadline_timeouts,
+    http_session,
+)
+
+logger = get_logger("tools")
+
+CALENDAR_TIMEZONE = 'America/Los_Angeles'
+# Google Calendar accepts at most 50 calls per batch request.
+CALENDAR_BATCH_LIMIT = 50
+# Hours (local, weekdays) searched for free slots, as "start-end".
+CALENDAR_WORKDAY = tuple(int(h) for h in os.getenv("CALENDAR_WORKDAY", "9-17").split("-"))
+# freebusy.query accepts at most 50 calendars per call.
+FREEBUSY_MAX_CALENDARS = 50
+# people.getBatchGet accepts at most 200 resource names per call.
+PEOPLE_BATCH_GET_LIMIT = 200
+
+
+def _outbound_token_request(app_id, user_id, access_token):
     project_id = os.getenv("DESCOPE_PROJECT_ID")
 
-    url = "https://api.descope.com/v1/mgmt/outbound/app/user/token/latest"
+    api_base = os.getenv("DESCOPE_API_BASE", "https://api.descope.com")
+    url = f"{api_base}/v1/mgmt/outbound/app/user/token/latest"
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {project_id}:{access_token}",
@@ -22,14 +49,210 @@ def get_outbound_token(app_id, user_id, access_token):
         "appId": app_id,
         "userId": user_id,
     }
+    return {"url": url, "headers": headers, "json": payload}
+
+
+def _parse_outbound_token(body):
+    token = body["token"]
+    expiry = token.get("accessTokenExpiry")
+    try:
+        expires_at = float(expiry) if expiry else None
+    except (TypeError, ValueError):
+        expires_at = None
+    return token.get("accessToken"), expires_at
 
-    response = requests.post(url, headers=headers, json=payload)
+
+def fetch_outbound_token(app_id, user_id, access_token):
+    """Fetch Google token from Descope Connections vault using the MCP access token.
+
+    Returns ``(access_token, expires_at)`` where ``expires_at`` is epoch seconds,
+    or None when Descope doesn't report an expiry.
+    """
+    request = _outbound_token_request(app_id, user_id, access_token)
+    with span("outbound_token_fetch", app_id=app_id), breaker("descope").guard(SYNC_TRANSPORT_ERRORS) as outcome:
+        response = http_session().post(**request)
+        outcome.status = response.status_code
 
     if response.status_code != 200:
         raise Exception(f"Failed to fetch token: {response.status_code} {response.text}")
+    return _parse_outbound_token(response.json())
+
+
+async def afetch_outbound_token(app_id, user_id, access_token):
+    """``fetch_outbound_token`` on the event loop's shared async client."""
+    request = _outbound_token_request(app_id, user_id, access_token)
+    with span("outbound_token_fetch", app_id=app_id), breaker("descope").guard(ASYNC_TRANSPORT_ERRORS) as outcome, \
+            deadline_timeouts():
+        response = await async_http_client().post(**request, timeout=async_request_timeout())
+        outcome.status = response.status_code
+
+    if response.status_code != 200:
+        raise Exception(f"Failed to fetch token: {response.status_code} {response.text}")
+    return _parse_outbound_token(response.json())
+
+
+# Shared across all tool instances so a single run_crew (and concurrent crews
+# for the same user) reuse one Descope fetch until the token nears expiry.
+outbound_token_cache = OutboundTokenCache(
+    fetch_outbound_token,
+    refresh_margin=float(os.getenv("OUTBOUND_TOKEN_REFRESH_MARGIN", "60")),
+    store=shared_store,
+    afetch=afetch_outbound_token,
+)
+
+
+def get_outbound_token(app_id, user_id, access_token):
+    """Return a cached Google token for the user, fetching from Descope when needed."""
+    return outbound_token_cache.get(app_id, user_id, access_token)
 
-    data = response.json()
-    return data["token"].get("accessToken")
+
+async def aget_outbound_token(app_id, user_id, access_token):
+    return await outbound_token_cache.aget(app_id, user_id, access_token)
+
+
+def outbound_token_cache_stats() -> dict:
+    return outbound_token_cache.stats()
+
+
+contacts_store = ContactsStore()
+calendar_store = CalendarStore(tz=CALENDAR_TIMEZONE)
+
+
+# Ids tried for one create before giving up, when the idempotent id is held
+# by a deleted event (Calendar keeps their ids) or by a different one.
+_EVENT_ID_ATTEMPTS = 3
+
+
+def _event_id(idempotency_key, *parts):
+    """Deterministic Calendar event id (base32hex, as the API requires)."""
+    digest = hashlib.sha256("\0".join(str(p) for p in (idempotency_key, *parts)).encode()).digest()
+    return base64.b32hexencode(digest).decode().rstrip("=").lower()
+
+
+def _attendee_set(event):
+    return sorted({a.get('email', '').lower() for a in event.get('attendees', [])})
+
+
+def _same_event(existing, event):
+    """Whether the event found under our id is the one being created (e.g. by an earlier attempt)."""
+    return (existing.get('status') != 'cancelled' and existing.get('summary') == event['summary']
+            and _attendee_set(existing) == _attendee_set(event))
+
+
+def _insert_event(service, http, event):
+    """events.insert, idempotent on ``event['id']``; returns (event, already_existed).
+
+    A 409 means an event already has our id: if it is this one, the earlier
+    attempt succeeded; if it was deleted or differs, insert under a new id.
+    """
+    for _ in range(_EVENT_ID_ATTEMPTS):
+        try:
+            return service.events().insert(calendarId='primary', body=event, sendUpdates='all').execute(http=http), False
+        except HttpError as error:
+            if error.resp.status != 409 or 'id' not in event:
+                raise
+        existing = service.events().get(calendarId='primary', eventId=event['id']).execute(http=http)
+        if _same_event(existing, event):
+            return existing, True
+        event['id'] = _event_id(event['id'], "next")
+    raise ValueError("the event's id is taken by deleted or different events")
+
+
+async def _ainsert_event(service, google_token, event):
+    """``_insert_event`` on the event loop."""
+    for _ in range(_EVENT_ID_ATTEMPTS):
+        try:
+            created = await execute_async(
+                service.events().insert(calendarId='primary', body=event, sendUpdates='all'), google_token
+            )
+            return created, False
+        except HttpError as error:
+            if error.resp.status != 409 or 'id' not in event:
+                raise
+        existing = await execute_async(service.events().get(calendarId='primary', eventId=event['id']), google_token)
+        if _same_event(existing, event):
+            return existing, True
+        event['id'] = _event_id(event['id'], "next")
+    raise ValueError("the event's id is taken by deleted or different events")
+
+
+def _event_body(title, start_time, end_time, description, invitees, idempotency_key=None, recurrence=None):
+    """Calendar event resource for a create, plus the parsed attendee emails."""
+    # Create the event object
+    event = {
+        'summary': title,
+        'description': description or '',
+        'start': {'dateTime': start_time, 'timeZone': CALENDAR_TIMEZONE},
+        'end': {'dateTime': end_time or start_time, 'timeZone': CALENDAR_TIMEZONE}
+    }
+    
+    # Add attendees if provided
+    attendee_emails = _split_emails(invitees)
+    if attendee_emails:
+        event['attendees'] = [{'email': email} for email in attendee_emails]
+    if recurrence:
+        event['recurrence'] = [recurrence]
+    
+    # A retried request derives the same event id, so Google rejects
+    # the duplicate insert (409) instead of creating a second event.
+    if idempotency_key:
+        event['id'] = _event_id(idempotency_key, title, start_time, event['end']['dateTime'],
+                                ",".join(_attendee_set(event)), recurrence or "")
+    return event, attendee_emails
+
+
+def _split_emails(invitees):
+    return [email.strip() for email in (invitees or '').split(',') if email.strip()]
+
+
+def _guarded(method):
+    """Run a tool entry point under the request's deadline.
+
+    The deadline is made current for the HTTP calls underneath (CrewAI may
+    call tools on its own threads). A tool called after it has passed, or
+    whose dependency's circuit breaker is open, returns an error the agent
+    can report instead of waiting. Error results are flagged on the progress
+    reporter so the run's result isn't replayed to retries.
+    """
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def run_async(self, *args, **kwargs):
+            with deadline_scope(self.deadline):
+                try:
+                    check(f"tool:{self.name}")
+                    result = await method(self, *args, **kwargs)
+                except (DeadlineExceeded, CircuitOpen) as e:
+                    result = f"Error: {e}"
+            return _flag_error(self, result)
+        return run_async
+
+    @functools.wraps(method)
+    def run(self, *args, **kwargs):
+        with deadline_scope(self.deadline):
+            try:
+                check(f"tool:{self.name}")
+                result = method(self, *args, **kwargs)
+            except (DeadlineExceeded, CircuitOpen) as e:
+                result = f"Error: {e}"
+        return _flag_error(self, result)
+    return run
+
+
+# How tool results that report a failure start.
+_TOOL_ERROR_PREFIXES = ("Error:", "Google Calendar API Error", "Google People API Error", "Exception ")
+
+
+def _flag_error(tool, result):
+    progress = getattr(tool, "progress", None)
+    if progress is not None and isinstance(result, str) and result.startswith(_TOOL_ERROR_PREFIXES):
+        progress.tool_error()
+    return result
+
+
+def _report(progress, message, partial=None):
+    """Send a milestone to the run_crew caller, if the tool was given a reporter."""
+    if progress is not None:
+        progress.emit(message, partial=partial)
 
 class MyCustomToolInput(BaseModel):
     """Input schema for MyCustomTool."""
@@ -62,13 +285,20 @@ class CalendarCreateTool(BaseTool):
     args_schema: Type[BaseModel] = CalendarInput
     user_id: str = None
     access_token: str = None
+    progress: Any = None
+    deadline: Any = None
+    idempotency_key: Optional[str] = None
     base_url: str = "https://www.googleapis.com/calendar/v3"
 
-    def __init__(self, user_id=None, access_token=None):
+    def __init__(self, user_id=None, access_token=None, progress=None, idempotency_key=None, deadline=None):
         super().__init__()
         self.user_id = user_id
         self.access_token = access_token
+        self.progress = progress
+        self.deadline = deadline
+        self.idempotency_key = idempotency_key
 
+    @_guarded
     def _run(self, event_title: Optional[str] = None,
              start_time: Optional[str] = None, end_time: Optional[str] = None,
              description: Optional[str] = None, event_id: Optional[str] = None,
@@ -79,195 +309,507 @@ class CalendarCreateTool(BaseTool):
         if not google_token:
             return "Error: No valid access token available for Google Calendar API"
 
-        return self._create_event(google_token, event_title, start_time, end_time, description, invitees)
+        _report(self.progress, f"Creating calendar event '{event_title}'")
+        result = self._create_event(google_token, event_title, start_time, end_time, description, invitees)
+        if result.startswith("Event created"):
+            _report(self.progress, "Calendar event created", partial=result)
+        return result
+
+    @_guarded
+    async def _arun(self, event_title: Optional[str] = None,
+                    start_time: Optional[str] = None, end_time: Optional[str] = None,
+                    description: Optional[str] = None, event_id: Optional[str] = None,
+                    invitees: Optional[str] = None) -> str:
+        """Same as ``_run``, awaiting Descope and Google on the event loop's shared client."""
+        google_token = await aget_outbound_token("google-calendar", self.user_id, self.access_token)
+
+        if not google_token:
+            return "Error: No valid access token available for Google Calendar API"
+
+        _report(self.progress, f"Creating calendar event '{event_title}'")
+        result = await self._acreate_event(google_token, event_title, start_time, end_time, description, invitees)
+        if result.startswith("Event created"):
+            _report(self.progress, "Calendar event created", partial=result)
+        return result
 
     def _create_event(self, google_token, title, start_time, end_time, description, invitees=None):
         if not title or not start_time:
             return "Error: title and start_time required"
 
         try:
-            auth = credentials.Credentials(token=google_token)
-            
-            # Build the Google Calendar service
-            service = build("calendar", "v3", credentials=auth)
-            
-            # Create the event object
-            event = {
-                'summary': title,
-                'description': description or '',
-                'start': {'dateTime': start_time, 'timeZone': 'America/Los_Angeles'},
-                'end': {'dateTime': end_time or start_time, 'timeZone': 'America/Los_Angeles'}
-            }
-            
-            # Add attendees if provided
-            if invitees:
-                attendee_emails = [email.strip() for email in invitees.split(',') if email.strip()]
-                if attendee_emails:
-                    event['attendees'] = [{'email': email} for email in attendee_emails]
-            
-            print(f"Creating event: {json.dumps(event, indent=2)}")
-            
-            # Call the Google Calendar API using the official client library
-            # Set sendUpdates to 'all' to send email invitations to attendees
-            created_event = service.events().insert(
-                calendarId='primary', 
-                body=event,
-                sendUpdates='all'  # Send email invitations to attendees
-            ).execute()
-            
-            # Build response message
-            response = f"Event created successfully: {created_event.get('id')} - {created_event.get('summary')}"
-            
-            if invitees and attendee_emails:
-                response += f"\nInvitations sent to: {', '.join(attendee_emails)}"
-            
-            return response
+            service = google_service("calendar", "v3")
+            event, attendee_emails = _event_body(title, start_time, end_time, description, invitees,
+                                                 self.idempotency_key)
+            logger.debug("Creating event", extra={"user_id": self.user_id, "event": event})
+
+            # Call the Google Calendar API using the official client library;
+            # sendUpdates='all' sends email invitations to attendees
+            created_event, _ = _insert_event(service, user_http(google_token), event)
+
+            return self._created_message(created_event, attendee_emails)
             
         except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-calendar", self.user_id)
             return f"Google Calendar API Error: {error}"
         except Exception as e:
             return f"Exception creating event: {str(e)}"
 
+    async def _acreate_event(self, google_token, title, start_time, end_time, description, invitees=None):
+        if not title or not start_time:
+            return "Error: title and start_time required"
+
+        try:
+            service = google_service("calendar", "v3")
+            event, attendee_emails = _event_body(title, start_time, end_time, description, invitees,
+                                                 self.idempotency_key)
+            logger.debug("Creating event", extra={"user_id": self.user_id, "event": event})
+            created_event, _ = await _ainsert_event(service, google_token, event)
+
+            return self._created_message(created_event, attendee_emails)
+
+        except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-calendar", self.user_id)
+            return f"Google Calendar API Error: {error}"
+        except Exception as e:
+            return f"Exception creating event: {str(e)}"
+
+    @staticmethod
+    def _created_message(created_event, attendee_emails):
+        start = created_event.get('start') or {}
+        parts = [f"Event created: {created_event.get('summary')}",
+                 start.get('dateTime') or start.get('date') or "", f"id {created_event.get('id')}"]
+        if attendee_emails:
+            parts.append(f"invited: {', '.join(attendee_emails)}")
+        return " | ".join(p for p in parts if p)
+
+
+class CalendarOperation(BaseModel):
+    """One event operation inside a calendar batch."""
+    action: Literal["create", "update", "delete"] = Field("create", description="create, update or delete")
+    event_id: Optional[str] = Field(None, description="Event ID (required for update/delete)")
+    event_title: Optional[str] = Field(None, description="Event title (required for create)")
+    start_time: Optional[str] = Field(None, description="Start time (ISO format, required for create)")
+    end_time: Optional[str] = Field(None, description="End time (ISO format)")
+    description: Optional[str] = Field(None, description="Event description")
+    invitees: Optional[str] = Field(None, description="Comma-separated list of email addresses to invite")
+    recurrence: Optional[str] = Field(None, description="RRULE for a repeating event, e.g. RRULE:FREQ=WEEKLY;COUNT=8")
+
+class CalendarBatchInput(BaseModel):
+    """Input schema for batched Google Calendar operations."""
+    operations: List[CalendarOperation] = Field(..., description="Event operations to run together")
+
+class CalendarBatchTool(BaseTool):
+    name: str = "Batch Calendar Events"
+    description: str = (
+        "Create, update or delete several Google Calendar events in one call. "
+        "Use this instead of repeated single-event calls when a request involves more than one event."
+    )
+    args_schema: Type[BaseModel] = CalendarBatchInput
+    user_id: str = None
+    access_token: str = None
+    progress: Any = None
+    deadline: Any = None
+    idempotency_key: Optional[str] = None
+
+    def __init__(self, user_id=None, access_token=None, progress=None, idempotency_key=None, deadline=None):
+        super().__init__()
+        self.user_id = user_id
+        self.access_token = access_token
+        self.progress = progress
+        self.deadline = deadline
+        self.idempotency_key = idempotency_key
+
+    @_guarded
+    def _run(self, operations: List[Any]) -> str:
+        operations = [op if isinstance(op, CalendarOperation) else CalendarOperation(**op) for op in operations]
+        if not operations:
+            return "Error: no operations given"
+
+        google_token = get_outbound_token("google-calendar", self.user_id, self.access_token)
+
+        if not google_token:
+            return "Error: No valid access token available for Google Calendar API"
+
+        _report(self.progress, f"Running {len(operations)} calendar operations")
+        results = [None] * len(operations)
+        service = google_service("calendar", "v3")
+        http = user_http(google_token)
+        requests = []
+        for index, op in enumerate(operations):
+            try:
+                requests.append((index, self._request(service, op)))
+            except ValueError as e:
+                results[index] = f"{op.action} failed: {e}"
+
+        conflicts = []
+
+        def record(request_id, response, exception):
+            index = int(request_id)
+            if operations[index].action == "create" and getattr(getattr(exception, 'resp', None), 'status', None) == 409:
+                conflicts.append(index)  # resolved below: retry, or an earlier attempt's event
+                return
+            results[index] = self._describe(operations[index], response, exception)
+
+        try:
+            # One HTTP round-trip per CALENDAR_BATCH_LIMIT operations, with a
+            # separate result (or error) for each of them.
+            for chunk in range(0, len(requests), CALENDAR_BATCH_LIMIT):
+                batch = service.new_batch_http_request(callback=record)
+                for index, request in requests[chunk:chunk + CALENDAR_BATCH_LIMIT]:
+                    batch.add(request, request_id=str(index))
+                batch.execute(http=http)
+            for index in conflicts:
+                op = operations[index]
+                try:
+                    event, existed = _insert_event(service, http, self._create_body(op))
+                except (HttpError, ValueError) as e:
+                    results[index] = f"create failed: {e}"
+                    continue
+                results[index] = (f"created (already existed): {op.event_title}" if existed
+                                  else self._describe(op, event, None))
+        except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-calendar", self.user_id)
+            return f"Google Calendar API Error: {error}"
+        except Exception as e:
+            return f"Exception running calendar batch: {str(e)}"
+
+        lines = [f"{i + 1}. {result or 'not executed'}" for i, result in enumerate(results)]
+        failed = [line for line, result in zip(lines, results) if not result or " failed" in result]
+        succeeded = len(lines) - len(failed)
+        if failed and self.progress is not None:
+            self.progress.tool_error()
+        # Failures first: they are what the agent has to act on if the budget cuts the list.
+        summary = fit_budget(f"Batch finished: {succeeded} of {len(operations)} operations succeeded.",
+                             failed + [line for line in lines if line not in failed],
+                             omitted="more operation results omitted")
+        _report(self.progress, "Calendar batch finished", partial=summary)
+        return summary
+
+    def _request(self, service, op: CalendarOperation):
+        if op.action == "create":
+            if not op.event_title or not op.start_time:
+                raise ValueError("event_title and start_time required")
+            return service.events().insert(calendarId='primary', body=self._create_body(op), sendUpdates='all')
+
+        if not op.event_id:
+            raise ValueError("event_id required")
+        if op.action == "delete":
+            return service.events().delete(calendarId='primary', eventId=op.event_id, sendUpdates='all')
+
+        patch = {}
+        if op.event_title:
+            patch['summary'] = op.event_title
+        if op.description is not None:
+            patch['description'] = op.description
+        if op.start_time:
+            patch['start'] = {'dateTime': op.start_time, 'timeZone': CALENDAR_TIMEZONE}
+        if op.end_time:
+            patch['end'] = {'dateTime': op.end_time, 'timeZone': CALENDAR_TIMEZONE}
+        if op.invitees:
+            patch['attendees'] = [{'email': email} for email in _split_emails(op.invitees)]
+        if op.recurrence:
+            patch['recurrence'] = [op.recurrence]
+        if not patch:
+            raise ValueError("nothing to update")
+        return service.events().patch(calendarId='primary', eventId=op.event_id, body=patch, sendUpdates='all')
+
+    def _create_body(self, op: CalendarOperation) -> dict:
+        event, _ = _event_body(op.event_title, op.start_time, op.end_time, op.description, op.invitees,
+                               self.idempotency_key, op.recurrence)
+        return event
+
+    @staticmethod
+    def _describe(op: CalendarOperation, response, exception) -> str:
+        if exception is not None:
+            return f"{op.action} failed: {exception}"
+        if op.action == "delete":
+            return f"deleted: {op.event_id}"
+        verb = "created" if op.action == "create" else "updated"
+        return f"{verb}: {response.get('id')} - {response.get('summary')}"
+
+
+class AvailabilityInput(BaseModel):
+    """Input schema for calendar availability checks."""
+    start_time: str = Field(..., description="Slot start, or where to start searching (ISO format)")
+    end_time: Optional[str] = Field(None, description="Slot end, or where to stop searching (ISO format)")
+    find_free_slot: bool = Field(False, description="Search for the next free slots instead of checking one slot")
+    duration_minutes: int = Field(60, description="Length of the slot to check or find")
+    invitees: Optional[str] = Field(None, description="Comma-separated emails whose availability should also be checked")
+
+class CalendarAvailabilityTool(BaseTool):
+    name: str = "Calendar Availability"
+    description: str = (
+        "Check whether a time slot is free on the user's calendar (and invitees' calendars), "
+        "or find the next free slots of a given length, e.g. the next free hour on Tuesday."
+    )
+    args_schema: Type[BaseModel] = AvailabilityInput
+    user_id: str = None
+    access_token: str = None
+    progress: Any = None
+    deadline: Any = None
+
+    def __init__(self, user_id=None, access_token=None, progress=None, deadline=None):
+        super().__init__()
+        self.user_id = user_id
+        self.access_token = access_token
+        self.progress = progress
+        self.deadline = deadline
+
+    @_guarded
+    def _run(self, start_time: str, end_time: Optional[str] = None, find_free_slot: bool = False,
+             duration_minutes: int = 60, invitees: Optional[str] = None) -> str:
+        tz = calendar_store.tz
+        try:
+            start = parse_time(start_time, tz)
+            duration = max(1, int(duration_minutes)) * 60
+            if end_time:
+                end = parse_time(end_time, tz)
+            elif find_free_slot:
+                end = start + 7 * 86400
+            else:
+                end = start + duration
+        except (TypeError, ValueError) as e:
+            return f"Error: invalid time: {e}"
+        if end <= start:
+            return "Error: end_time must be after start_time"
+
+        google_token = get_outbound_token("google-calendar", self.user_id, self.access_token)
+
+        if not google_token:
+            return "Error: No valid access token available for Google Calendar API"
+
+        _report(self.progress, "Checking calendar availability")
+        try:
+            service = google_service("calendar", "v3")
+            http = user_http(google_token)
+
+            def list_page(**params):
+                return service.events().list(
+                    calendarId='primary', singleEvents=True, maxResults=2500, **params
+                ).execute(http=http)
+
+            own = calendar_store.busy(self.user_id, list_page, start, end)
+            emails = _split_emails(invitees)
+            others, unknown = self._invitee_busy(service, http, emails, start, end) if emails else ({}, [])
+        except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-calendar", self.user_id)
+            return f"Google Calendar API Error: {error}"
+        except Exception as e:
+            return f"Exception checking availability: {str(e)}"
+
+        note = f"\nAvailability unknown for: {', '.join(unknown)}" if unknown else ""
+        if find_free_slot:
+            busy = [(s, e) for s, e, _, _ in own] + [i for intervals in others.values() for i in intervals]
+            windows = calendar_store.working_windows(start, end, CALENDAR_WORKDAY)
+            slots = free_slots(busy, windows, duration, limit=3)
+            if not slots:
+                return f"No free {duration_minutes}-minute slot found in working hours in that range.{note}"
+            lines = [f"- {self._format_range(s, e)}" for s, e in slots]
+            return f"Free slots ({CALENDAR_TIMEZONE}):\n" + "\n".join(lines) + note
+
+        conflicts = [f"- {summary}: {self._format_range(s, e)}" for s, e, _, summary in own]
+        for email, intervals in others.items():
+            conflicts.extend(f"- {email} busy: {self._format_range(s, e)}" for s, e in intervals)
+        if conflicts:
+            return fit_budget(f"Busy: {self._format_range(start, end)} conflicts with:", conflicts,
+                              omitted="more conflicts omitted") + note
+        return f"Free: {self._format_range(start, end)} has no conflicts.{note}"
+
+    @staticmethod
+    def _invitee_busy(service, http, emails, start, end):
+        """Busy intervals per invitee from freebusy.query, 50 calendars per call."""
+        busy, unknown = {}, []
+        tz = calendar_store.tz
+        for chunk in range(0, len(emails), FREEBUSY_MAX_CALENDARS):
+            items = [{'id': email} for email in emails[chunk:chunk + FREEBUSY_MAX_CALENDARS]]
+            response = service.freebusy().query(body={
+                'timeMin': datetime.fromtimestamp(start, tz).isoformat(),
+                'timeMax': datetime.fromtimestamp(end, tz).isoformat(),
+                'timeZone': CALENDAR_TIMEZONE,
+                'items': items,
+            }).execute(http=http)
+            for email, calendar in response.get('calendars', {}).items():
+                if calendar.get('errors'):
+                    unknown.append(email)
+                    continue
+                intervals = [(parse_time(b['start'], tz), parse_time(b['end'], tz)) for b in calendar.get('busy', [])]
+                if intervals:
+                    busy[email] = intervals
+        return busy, unknown
+
+    @staticmethod
+    def _format_range(start, end):
+        tz = calendar_store.tz
+        s, e = datetime.fromtimestamp(start, tz), datetime.fromtimestamp(end, tz)
+        if s.date() == e.date():
+            return f"{s:%a %Y-%m-%d %H:%M}-{e:%H:%M}"
+        return f"{s:%a %Y-%m-%d %H:%M} - {e:%a %Y-%m-%d %H:%M}"
+
 
 class ContactsInput(BaseModel):
     """Input schema for Google Contacts operations."""
     query: Optional[str] = Field(None, description="Search query to find contacts")
     max_results: Optional[int] = Field(10, description="Maximum number of contacts to return")
+    fields: Optional[str] = Field(
+        None,
+        description="Comma-separated extra fields to return: phone, address "
+                    "(name, email and organization are always returned)",
+    )
 
 class GoogleContactsTool(BaseTool):
     name: str = "Google Contacts Search"
-    description: str = "Search and retrieve information from Google Contacts"
+    description: str = "Search Google Contacts; returns one line per contact, best match first"
     args_schema: Type[BaseModel] = ContactsInput
     user_id: str = None
     access_token: str = None
+    progress: Any = None
+    deadline: Any = None
+    request_hint: Optional[str] = None
 
-    def __init__(self, user_id=None, access_token=None):
+    def __init__(self, user_id=None, access_token=None, progress=None, request_hint=None, deadline=None):
         super().__init__()
         self.user_id = user_id
         self.access_token = access_token
+        self.progress = progress
+        self.deadline = deadline
+        # The user's original request, used to pick the fields to return.
+        self.request_hint = request_hint
 
+    @_guarded
     def _run(self, query: Optional[str] = None,
-             max_results: Optional[int] = 10) -> str:
+             max_results: Optional[int] = 10, fields: Optional[str] = None) -> str:
 
         google_token = get_outbound_token("google-contacts", self.user_id, self.access_token)
 
         if not google_token:
             return "Error: No valid access token available for Google Contacts API"
 
-        return self._search_contacts(google_token, query, max_results)
+        _report(self.progress, f"Searching contacts for '{query}'")
+        result = self._search_contacts(google_token, query, max_results or 10,
+                                       contact_fields(fields, self.request_hint))
+        _report(self.progress, "Contact search finished", partial=result)
+        return result
 
-    def _search_contacts(self, google_token: str, query: str = None, max_results: int = 10) -> str:
-        try:
-            auth = credentials.Credentials(token=google_token)
+    @_guarded
+    async def _arun(self, query: Optional[str] = None,
+                    max_results: Optional[int] = 10, fields: Optional[str] = None) -> str:
+        """Same as ``_run``, awaiting Descope and Google on the event loop's shared client."""
+        google_token = await aget_outbound_token("google-contacts", self.user_id, self.access_token)
+
+        if not google_token:
+            return "Error: No valid access token available for Google Contacts API"
 
-            # Build the Google People service
-            service = build("people", "v1", credentials=auth)
+        _report(self.progress, f"Searching contacts for '{query}'")
+        result = await self._asearch_contacts(google_token, query, max_results or 10,
+                                              contact_fields(fields, self.request_hint))
+        _report(self.progress, "Contact search finished", partial=result)
+        return result
+
+    def _search_contacts(self, google_token: str, query: str = None, max_results: int = 10,
+                         projection: tuple = DEFAULT_CONTACT_FIELDS) -> str:
+        try:
+            service = google_service("people", "v1")
+            http = user_http(google_token)
 
             # List the user's contacts and filter client-side. This is more
             # reliable than people.searchContacts, which requires an index
-            # warm-up call and typically returns empty on first use.
-            people = []
-            page_token = None
-            while True:
-                response = service.people().connections().list(
+            # warm-up call and typically returns empty on first use. The store
+            # keeps the listing per user and only pulls changes since the last
+            # sync token.
+            def list_page(**params):
+                return service.people().connections().list(
                     resourceName="people/me",
                     pageSize=1000,
-                    personFields="names,emailAddresses,phoneNumbers,organizations,addresses",
-                    pageToken=page_token,
-                ).execute()
-                people.extend(response.get("connections", []))
-                page_token = response.get("nextPageToken")
-                if not page_token:
-                    break
-
-            contacts_found = []
-            for person in people:
-                if self._contact_matches_query(person, query):
-                    contacts_found.append(self._format_contact_info(person))
-                    if len(contacts_found) >= max_results:
-                        break
-
-            if contacts_found:
-                return f"Found {len(contacts_found)} contacts:\n\n" + "\n\n".join(contacts_found)
-            else:
-                return f"No contacts found for query: '{query}'."
+                    personFields=PERSON_FIELDS,
+                    **params,
+                ).execute(http=http)
+
+            candidates = contacts_store.search(self.user_id, list_page, query, _candidate_count(max_results))
+            people = rank(candidates, query, _ranking_fields(projection))[:max_results]
+            extra = _extra_person_fields(projection)
+            if extra and people:
+                response = service.people().getBatchGet(
+                    resourceNames=[p["resourceName"] for p in people], personFields=extra,
+                ).execute(http=http)
+                people = _merge_person_details(people, response)
+            return self._format_results(people, query, projection)
 
         except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-contacts", self.user_id)
             return f"Google People API Error: {error}"
         except Exception as e:
             return f"Exception searching contacts: {str(e)}"
 
-    def _contact_matches_query(self, person: dict, query: str) -> bool:
-        """Check if a contact matches the search query."""
-        if not query:
-            return True
-            
-        query_lower = query.lower()
-        
-        # Check names
-        if person.get('names'):
-            for name in person['names']:
-                display_name = name.get('displayName', '').lower()
-                given_name = name.get('givenName', '').lower()
-                family_name = name.get('familyName', '').lower()
-                if query_lower in display_name or query_lower in given_name or query_lower in family_name:
-                    return True
-        
-        # Check emails
-        if person.get('emailAddresses'):
-            for email in person['emailAddresses']:
-                email_value = email.get('value', '').lower()
-                if query_lower in email_value:
-                    return True
-        
-        # Check organizations
-        if person.get('organizations'):
-            for org in person['organizations']:
-                org_name = org.get('name', '').lower()
-                if query_lower in org_name:
-                    return True
-        
-        return False
-
-    def _format_contact_info(self, person: dict) -> str:
-        """Format contact information for display."""
-        info_parts = []
-        
-        # Name
-        if person.get('names'):
-            name = person['names'][0]
-            display_name = name.get('displayName', 'Unknown')
-            info_parts.append(f"Name: {display_name}")
-        
-        # Email addresses
-        if person.get('emailAddresses'):
-            emails = [email.get('value', '') for email in person['emailAddresses']]
-            info_parts.append(f"Emails: {', '.join(emails)}")
-        
-        # Phone numbers
-        if person.get('phoneNumbers'):
-            phones = [phone.get('value', '') for phone in person['phoneNumbers']]
-            info_parts.append(f"Phones: {', '.join(phones)}")
-        
-        # Organizations
-        if person.get('organizations'):
-            orgs = []
-            for org in person['organizations']:
-                org_name = org.get('name', '')
-                org_title = org.get('title', '')
-                if org_name and org_title:
-                    orgs.append(f"{org_title} at {org_name}")
-                elif org_name:
-                    orgs.append(org_name)
-                elif org_title:
-                    orgs.append(org_title)
-            if orgs:
-                info_parts.append(f"Organizations: {', '.join(orgs)}")
-        
-        # Addresses
-        if person.get('addresses'):
-            addresses = [addr.get('formattedValue', '') for addr in person['addresses']]
-            info_parts.append(f"Addresses: {', '.join(addresses)}")
-        
-        return "\n".join(info_parts) if info_parts else "No contact information available"
+    async def _asearch_contacts(self, google_token: str, query: str = None, max_results: int = 10,
+                                projection: tuple = DEFAULT_CONTACT_FIELDS) -> str:
+        try:
+            service = google_service("people", "v1")
+
+            async def list_page(**params):
+                return await execute_async(
+                    service.people().connections().list(
+                        resourceName="people/me",
+                        pageSize=1000,
+                        personFields=PERSON_FIELDS,
+                        **params,
+                    ),
+                    google_token,
+                )
+
+            candidates = await contacts_store.asearch(self.user_id, list_page, query, _candidate_count(max_results))
+            people = rank(candidates, query, _ranking_fields(projection))[:max_results]
+            extra = _extra_person_fields(projection)
+            if extra and people:
+                response = await execute_async(
+                    service.people().getBatchGet(
+                        resourceNames=[p["resourceName"] for p in people], personFields=extra,
+                    ),
+                    google_token,
+                )
+                people = _merge_person_details(people, response)
+            return self._format_results(people, query, projection)
+
+        except HttpError as error:
+            if error.resp.status == 401:
+                outbound_token_cache.invalidate("google-contacts", self.user_id)
+            return f"Google People API Error: {error}"
+        except Exception as e:
+            return f"Exception searching contacts: {str(e)}"
+
+    @staticmethod
+    def _format_results(people: list, query: Optional[str], projection: tuple) -> str:
+        if not people:
+            return f"No contacts found for query: '{query}'."
+        header = f"Found {len(people)} contacts, best match first ({' | '.join(projection)}):"
+        lines = [f"{i}. {format_contact(person, projection)}" for i, person in enumerate(people, 1)]
+        return fit_budget(header, lines, omitted="more contacts omitted; narrow the query")
+
+
+def _candidate_count(max_results: int) -> int:
+    # Rank a few more matches than are returned so better ones can move up.
+    return min(max_results * 2, PEOPLE_BATCH_GET_LIMIT)
+
+
+def _ranking_fields(projection: tuple) -> tuple[str, ...]:
+    indexed = PERSON_FIELDS.split(",")
+    return tuple(CONTACT_FIELDS[f] for f in projection if f != "name" and CONTACT_FIELDS[f] in indexed)
+
+
+def _extra_person_fields(projection: tuple) -> str:
+    """personFields outside the index, fetched for the returned contacts only."""
+    indexed = PERSON_FIELDS.split(",")
+    return ",".join(CONTACT_FIELDS[f] for f in projection if CONTACT_FIELDS[f] not in indexed)
+
 
+def _merge_person_details(people: list, response: dict) -> list:
+    details = {r.get("requestedResourceName"): r.get("person") or {} for r in response.get("responses", [])}
+    merged = []
+    for person in people:
+        extra = details.get(person.get("resourceName"), {})
+        merged.append({**person, **{k: v for k, v in extra.items() if k not in ("resourceName", "etag")}})
+    return merged
@@ -0,0 +1,61 @@
+import json
+import os
+import threading
+
+from google.oauth2 import credentials
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from transport import AuthorizedHttp, async_authorized_request
+
+# Overrides every API's rootUrl (e.g. http://127.0.0.1:9000/ for local stand-ins).
+GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT")
+
+_services: dict[tuple[str, str], object] = {}
+_lock = threading.Lock()
+
+
+def google_service(name: str, version: str):
+    """Return the process-wide discovery client for a Google API surface.
+
+    The resource tree is built once from the discovery document bundled with
+    googleapiclient. It carries no credentials: every request must be executed
+    with ``.execute(http=user_http(token))``, so nothing user-specific is ever
+    stored on the shared object (a request executed without one is simply
+    unauthenticated and rejected by Google).
+    """
+    key = (name, version)
+    service = _services.get(key)
+    if service is not None:
+        return service
+    with _lock:
+        service = _services.get(key)
+        if service is None:
+            doc = get_static_doc(name, version)
+            if doc is not None:
+                doc = json.loads(doc)
+                if GOOGLE_API_ROOT:
+                    doc["rootUrl"] = GOOGLE_API_ROOT.rstrip("/") + "/"
+                service = build_from_document(doc, http=AuthorizedHttp())
+            else:
+                service = build(name, version, http=AuthorizedHttp(), static_discovery=False)
+            _services[key] = service
+    return service
+
+
+def user_http(google_token: str) -> AuthorizedHttp:
+    """Per-request HTTP binding for one user's Google token."""
+    return AuthorizedHttp(credentials.Credentials(token=google_token))
+
+
+async def execute_async(request, google_token: str):
+    """Await a googleapiclient request on the shared async client.
+
+    ``request`` is the unexecuted HttpRequest from the discovery client (e.g.
+    ``service.events().insert(...)``); the response goes through its own
+    ``postproc``, so decoding and HttpError raising match ``.execute()``.
+    """
+    headers = dict(request.headers)
+    headers["authorization"] = f"Bearer {google_token}"
+    resp, content = await async_authorized_request(request.uri, request.method, request.body, headers)
+    return request.postproc(resp, content)
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from deadline import DeadlineExceeded
+
+
+class _LeaderCancelled(Exception):
+    """The fetch being waited on was cancelled or ran out of its caller's
+    deadline; the waiter starts over."""
+
+
+class _Flight:
+    """A fetch in progress that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.token: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+    def wait(self) -> Optional[str]:
+        self.done.wait()
+        if self.cancelled:
+            raise _LeaderCancelled()
+        if self.error is not None:
+            raise self.error
+        return self.token
+
+
+class OutboundTokenCache:
+    """Process-wide cache of Descope outbound (Google) tokens per (app_id, user_id).
+
+    Tokens are reused until ``refresh_margin`` seconds before the expiry that
+    Descope reports, and only one fetch per key is ever in flight — concurrent
+    crews for the same user wait for it instead of each calling Descope.
+    With a shared ``store`` the fetched token is also published for the other
+    worker processes, which check it before calling Descope themselves.
+    ``get`` (crew threads) and ``aget`` (event loop) share the same entries
+    and in-flight fetches.
+    """
+
+    def __init__(self, fetch: Callable[[str, str, str], tuple[Optional[str], Optional[float]]],
+                 refresh_margin: float = 60.0, default_ttl: float = 300.0, store=None,
+                 afetch: Optional[Callable[[str, str, str], Awaitable[tuple[Optional[str], Optional[float]]]]] = None):
+        # fetch(app_id, user_id, access_token) -> (token, expires_at epoch seconds or None)
+        self._fetch = fetch
+        self._afetch = afetch
+        self._refresh_margin = refresh_margin
+        self._default_ttl = default_ttl
+        self._store = store
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], tuple[str, float]] = {}
+        self._inflight: dict[tuple[str, str], _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def get(self, app_id: str, user_id: str, access_token: str) -> Optional[str]:
+        key = (app_id, user_id)
+        while True:
+            token, flight, leader = self._begin(key)
+            if flight is None:
+                return token
+            if leader:
+                break
+            try:
+                return flight.wait()
+            except _LeaderCancelled:
+                continue
+        try:
+            shared = self._load_shared(key)
+            if shared:
+                token, refresh_at = shared
+            else:
+                token, expires_at = self._fetch(app_id, user_id, access_token)
+                refresh_at = self._refresh_at(expires_at)
+                self._publish(key, token, refresh_at)
+        except DeadlineExceeded:
+            # Our deadline, not the fetch, failed: let a waiter take over.
+            self._settle(key, flight, cancelled=True)
+            raise
+        except BaseException as e:
+            self._settle(key, flight, error=e)
+            raise
+        self._settle(key, flight, token, refresh_at)
+        return token
+
+    async def aget(self, app_id: str, user_id: str, access_token: str) -> Optional[str]:
+        """``get`` for the event loop: the Descope call is awaited, not run on a thread."""
+        key = (app_id, user_id)
+        while True:
+            token, flight, leader = self._begin(key)
+            if flight is None:
+                return token
+            if leader:
+                break
+            try:
+                return await asyncio.to_thread(flight.wait)
+            except _LeaderCancelled:
+                continue
+        try:
+            # Store backends (SQLite, Redis) are blocking clients.
+            shared = await asyncio.to_thread(self._load_shared, key) if self._store else None
+            if shared:
+                token, refresh_at = shared
+            else:
+                token, expires_at = await self._afetch(app_id, user_id, access_token)
+                refresh_at = self._refresh_at(expires_at)
+                if self._store:
+                    await asyncio.to_thread(self._publish, key, token, refresh_at)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # This caller went away or ran out of time, which says nothing about
+            # the fetch: let a waiter take over instead of failing it with our error.
+            self._settle(key, flight, cancelled=True)
+            raise
+        except BaseException as e:
+            self._settle(key, flight, error=e)
+            raise
+        self._settle(key, flight, token, refresh_at)
+        return token
+
+    def _begin(self, key: tuple[str, str]) -> tuple[Optional[str], Optional[_Flight], bool]:
+        """(token, None, _) on a hit, else the flight to lead or wait on."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() < entry[1]:
+                self.hits += 1
+                return entry[0], None, False
+            flight = self._inflight.get(key)
+            if flight is None:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                return None, flight, True
+            self.coalesced += 1
+            return None, flight, False
+
+    def _settle(self, key: tuple[str, str], flight: _Flight, token: Optional[str] = None,
+                refresh_at: float = 0.0, error: Optional[BaseException] = None, cancelled: bool = False) -> None:
+        flight.token, flight.error, flight.cancelled = token, error, cancelled
+        with self._lock:
+            if token:
+                self._entries[key] = (token, refresh_at)
+            self._inflight.pop(key, None)
+        flight.done.set()
+
+    def _refresh_at(self, expires_at: Optional[float]) -> float:
+        if expires_at is None:
+            expires_at = time.time() + self._default_ttl
+        return expires_at - self._refresh_margin
+
+    def _load_shared(self, key: tuple[str, str]) -> Optional[tuple[str, float]]:
+        shared = self._store.get_json(self._store_key(key)) if self._store else None
+        if shared and time.time() < shared["refresh_at"]:
+            self.shared_hits += 1
+            return shared["token"], shared["refresh_at"]
+        return None
+
+    def _publish(self, key: tuple[str, str], token: Optional[str], refresh_at: float) -> None:
+        if token and self._store:
+            self._store.set_json(self._store_key(key), {"token": token, "refresh_at": refresh_at},
+                                 ttl=refresh_at - time.time())
+
+    def invalidate(self, app_id: str, user_id: str) -> None:
+        """Drop a cached token, e.g. after Google rejects it with a 401."""
+        with self._lock:
+            self._entries.pop((app_id, user_id), None)
+        if self._store:
+            self._store.delete(self._store_key((app_id, user_id)))
+
+    @staticmethod
+    def _store_key(key: tuple[str, str]) -> str:
+        return f"outbound-token:{key[0]}:{key[1]}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "shared_hits": self.shared_hits,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+            }
@@ -0,0 +1,83 @@
+import os
+import re
+from typing import Iterable, Optional
+
+# Upper bound on a single tool result fed back to the LLM, in (estimated) tokens.
+TOOL_OUTPUT_TOKENS = int(os.getenv("TOOL_OUTPUT_TOKENS", "300"))
+
+# Contact fields the tools can project, and the People API personFields for each.
+CONTACT_FIELDS = {
+    "name": "names",
+    "email": "emailAddresses",
+    "phone": "phoneNumbers",
+    "organization": "organizations",
+    "address": "addresses",
+}
+DEFAULT_CONTACT_FIELDS = ("name", "email", "organization")
+_FIELD_ALIASES = {"emails": "email", "phones": "phone", "org": "organization", "organizations": "organization",
+                  "company": "organization", "addresses": "address", "names": "name"}
+
+# Cues for fields beyond the defaults. Only unambiguous words: "call" or
+# "mobile release" in a scheduling request must not pull in phone numbers.
+_FIELD_HINTS = {
+    "phone": re.compile(r"\b(phones?|phone numbers?|cell|sms)\b"),
+    "address": re.compile(r"\b(address|addresses|lives?|located|mail|visit)\b"),
+}
+_ALL_FIELDS_HINT = re.compile(r"\b(details|info|information|everything)\b")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; close enough for a budget.
+    return len(text) // 4 + 1
+
+
+def contact_fields(fields: Optional[str] = None, request: Optional[str] = None) -> tuple[str, ...]:
+    """The contact fields to return, in CONTACT_FIELDS order.
+
+    Always the defaults (a calendar task after the lookup needs the email),
+    plus explicit ``fields`` (comma-separated) or, without them, the extra
+    fields the user's request asks for, e.g. phone for "Kevin's phone number".
+    """
+    if fields:
+        wanted = {_FIELD_ALIASES.get(f.strip().lower(), f.strip().lower()) for f in fields.split(",")}
+    else:
+        text = (request or "").lower()
+        if _ALL_FIELDS_HINT.search(text):
+            return tuple(CONTACT_FIELDS)
+        wanted = {field for field, pattern in _FIELD_HINTS.items() if pattern.search(text)}
+    return tuple(f for f in CONTACT_FIELDS if f in wanted or f in DEFAULT_CONTACT_FIELDS)
+
+
+def format_contact(person: dict, fields: Iterable[str]) -> str:
+    """One line per contact: ``Name | email, email | phone | Title at Org | address``."""
+    parts = []
+    for field in fields:
+        if field == "name":
+            names = person.get("names") or [{}]
+            parts.append(names[0].get("displayName") or "Unknown")
+        elif field == "organization":
+            orgs = [" at ".join(v for v in (org.get("title"), org.get("name")) if v)
+                    for org in person.get("organizations", [])]
+            parts.append(", ".join(o for o in orgs if o))
+        else:
+            values = [item.get("formattedValue" if field == "address" else "value", "")
+                      for item in person.get(CONTACT_FIELDS[field], [])]
+            parts.append(", ".join(v.replace("\n", ", ") for v in values if v))
+    return " | ".join(p if p else "-" for p in parts)
+
+
+def fit_budget(header: str, lines: list[str], budget: int = TOOL_OUTPUT_TOKENS,
+               omitted: str = "more results omitted") -> str:
+    """``header`` plus as many of ``lines`` (best first) as fit in ``budget`` tokens."""
+    used = estimate_tokens(header)
+    kept = []
+    for line in lines:
+        cost = estimate_tokens(line)
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    text = "\n".join([header, *kept])
+    if len(kept) < len(lines):
+        text += f"\n(+{len(lines) - len(kept)} {omitted})"
+    return text
@@ -0,0 +1,266 @@
+import asyncio
+import contextlib
+import os
+import threading
+import weakref
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from deadline import current_deadline
+from metrics import span
+from resilience import breaker
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # distinct hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.3"))
+# Connections the event loop's async client may open in total (all hosts).
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", "200"))
+
+# Errors that mean the dependency (not the request) failed, for circuit breakers.
+SYNC_TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout)
+ASYNC_TRANSPORT_ERRORS = (httpx.TransportError,)
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout for an outbound call, capped by the current run_crew deadline.
+
+    Raises DeadlineExceeded instead when the deadline has already passed.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+    deadline.check("http")
+    return deadline.timeout(HTTP_CONNECT_TIMEOUT), deadline.timeout(HTTP_READ_TIMEOUT)
+
+
+def async_request_timeout() -> httpx.Timeout:
+    connect, read = request_timeout()
+    return httpx.Timeout(read, connect=connect)
+
+
+@contextlib.contextmanager
+def deadline_timeouts():
+    """Re-raise a timeout that only hit because the deadline shortened it as DeadlineExceeded.
+
+    Such a timeout says nothing about the dependency, so circuit breakers
+    must not count it: a client asking for a 1s deadline would otherwise
+    open a breaker for every user. Wrap calls using ``request_timeout()``.
+    """
+    deadline = current_deadline()
+    remaining = deadline.remaining() if deadline is not None else None
+    try:
+        yield
+    except (requests.ConnectionError, requests.Timeout, httpx.TimeoutException) as e:
+        kind = _timeout_kind(e)
+        if kind is None or remaining is None or remaining >= (HTTP_CONNECT_TIMEOUT if kind == "connect" else HTTP_READ_TIMEOUT):
+            raise
+        raise deadline.exceeded("http") from e
+
+
+def _timeout_kind(error: Exception):
+    """"connect" or "read" if ``error`` is a timeout, else None."""
+    if isinstance(error, (requests.ConnectTimeout, httpx.ConnectTimeout)):
+        return "connect"
+    if isinstance(error, (requests.Timeout, httpx.TimeoutException)):
+        return "read"
+    # Once urllib3 has used up its retries, a read timeout surfaces as a
+    # ConnectionError wrapping MaxRetryError.
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    if isinstance(reason, ConnectTimeoutError):
+        return "connect"
+    if isinstance(reason, ReadTimeoutError):
+        return "read"
+    return None
+
+
+class _DeadlineRetry(Retry):
+    """urllib3 Retry that stops once the run_crew deadline leaves no room for another attempt.
+
+    Each attempt's timeout is capped to the time left, but urllib3 knows
+    nothing of the deadline and would otherwise keep retrying and backing
+    off well past it.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        deadline = current_deadline()
+        if deadline is None:
+            return retry
+        wait = retry.get_retry_after(response) if response is not None and self.respect_retry_after_header else None
+        if deadline.expired or (wait or retry.get_backoff_time()) >= deadline.remaining():
+            # Exhausted: raises MaxRetryError (or, for a status retry, returns the response).
+            return self.new(total=0).increment(method, url, response, error, _pool, _stacktrace)
+        return retry
+
+
+class _TimeoutSession(requests.Session):
+    """requests.Session that applies the default (connect, read) timeout."""
+
+    def request(self, method, url, **kwargs):
+        if "timeout" in kwargs:
+            return super().request(method, url, **kwargs)
+        with deadline_timeouts():
+            kwargs["timeout"] = request_timeout()
+            return super().request(method, url, **kwargs)
+
+
+def _build_session() -> requests.Session:
+    # Status retries only apply to idempotent methods (urllib3's default set),
+    # so a calendar insert is never replayed; connection failures are retried
+    # for every method since the request never reached the server.
+    retry = _DeadlineRetry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = _TimeoutSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """The process-wide pooled session used for every outbound call."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+class AuthorizedHttp:
+    """httplib2-compatible shim so googleapiclient rides on the pooled session.
+
+    googleapiclient only ever calls ``http.request(uri, method, body, headers)``
+    and reads ``resp.status``; ``credentials`` is picked up by batch requests.
+    """
+
+    def __init__(self, credentials=None, session: requests.Session | None = None):
+        self.credentials = credentials
+        self._session = session or http_session()
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=None, connection_type=None):
+        headers = dict(headers or {})
+        if self.credentials is not None:
+            self.credentials.apply(headers)
+        with span(_google_stage(uri)), google_breaker(uri).guard(SYNC_TRANSPORT_ERRORS) as outcome:
+            resp = self._session.request(method, uri, data=body, headers=headers)
+            outcome.status = resp.status_code
+        return _httplib2_response(resp.status_code, resp.headers, resp.reason), resp.content
+
+    def close(self):
+        # The underlying session is shared; nothing to release per request.
+        pass
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def async_http_client() -> httpx.AsyncClient:
+    """The running event loop's pooled async client (httpx pools are per loop)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=HTTP_ASYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_POOL_MAXSIZE),
+            # Connection failures only; status codes are not retried, matching
+            # the sync session for non-idempotent calls.
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_MAX_RETRIES),
+        )
+    return client
+
+
+async def close_async_http_client() -> None:
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def async_authorized_request(uri, method="GET", body=None, headers=None):
+    """Async counterpart of ``AuthorizedHttp.request`` with headers already authorized."""
+    with span(_google_stage(uri)), google_breaker(uri).guard(ASYNC_TRANSPORT_ERRORS) as outcome, \
+            deadline_timeouts():
+        resp = await async_http_client().request(method, uri, content=body, headers=headers,
+                                                 timeout=async_request_timeout())
+        outcome.status = resp.status_code
+    return _httplib2_response(resp.status_code, resp.headers, resp.reason_phrase), resp.content
+
+
+def _httplib2_response(status, headers, reason):
+    import httplib2  # only needed once the Google stack is loaded; keeps it off server startup
+
+    info = httplib2.Response({"status": status, **headers})
+    info.reason = reason
+    return info
+
+
+def _google_stage(uri: str) -> str:
+    path = urlparse(uri).path
+    if path.startswith("/batch"):
+        return "google_batch"
+    if path.startswith("/calendar"):
+        return "google_calendar"
+    if "/people" in path:
+        return "google_people"
+    return "google_other"
+
+
+def google_breaker(uri: str):
+    """Circuit breaker of the Google API a request goes to."""
+    stage = _google_stage(uri)
+    if stage in ("google_calendar", "google_batch"):  # only calendar calls are batched
+        return breaker("google-calendar")
+    if stage == "google_people":
+        return breaker("google-people")
+    return breaker("google")
+
+
+def pool_stats() -> list[dict]:
+    """Per-host connection pool utilization of the shared session."""
+    stats = []
+    if _session is None:
+        return stats
+    for adapter in set(_session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            queue = pool.pool
+            # The pool queue is pre-filled with None placeholders; a slot missing
+            # from the queue is a connection currently checked out.
+            stats.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": queue.maxsize,
+                "in_use": queue.maxsize - queue.qsize(),
+                "idle": sum(1 for conn in list(queue.queue) if conn is not None),
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+    return stats
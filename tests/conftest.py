@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service imports its modules top-level (api.py puts its directory on sys.path).
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "descope_agentic_crew"))
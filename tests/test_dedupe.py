@@ -0,0 +1,33 @@
+import asyncio
+
+from dedupe import RequestCoalescer
+from progress import ProgressReporter
+from resilience import CircuitBreaker, CircuitOpen
+
+
+def test_tool_error_result_is_not_replayed():
+    coalescer = RequestCoalescer(ttl=60)
+    contacts = CircuitBreaker("google-people", failure_threshold=1)
+    contacts.record_failure()
+
+    async def run_crew():
+        # What api.run_crew does, with the contacts tool reduced to its breaker check.
+        progress = ProgressReporter()
+
+        async def execute():
+            try:
+                contacts.before_call()
+            except CircuitOpen as e:
+                progress.tool_error()
+                return f"Error: {e}"
+            contacts.record_success()
+            return "Dana | dana@example.com | -"
+
+        return await coalescer.run("key", execute, cacheable=lambda _: not progress.tool_errors)
+
+    assert asyncio.run(run_crew()).startswith("Error: Google Contacts is temporarily unavailable")
+    contacts.record_success()
+    assert asyncio.run(run_crew()) == "Dana | dana@example.com | -"
+    assert coalescer.cache_hits == 0
+    assert asyncio.run(run_crew()) == "Dana | dana@example.com | -"
+    assert coalescer.cache_hits == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from router import CALENDAR_ONLY, CALENDAR_WITH_CONTACTS, CONTACTS_LOOKUP, classify
+
+
+@pytest.mark.parametrize("request_text", [
+    "Call Bob tomorrow at 3pm",
+    "call bob tomorrow",
+    "Set up a 1:1 for Priya next monday",
+    "Book coffee w/ Dana tomorrow",
+    "Schedule time for Kevin and me on Friday",
+    "Meet Alice tomorrow at 3",
+    "Find Bob's email for the meeting tomorrow",
+    "Invite Dave to standup",
+    "Schedule a meeting with alice tomorrow at 3pm",
+    "schedule lunch with my manager Dana",
+])
+def test_possible_invitee_keeps_contacts_task(request_text):
+    assert classify(request_text).path == CALENDAR_WITH_CONTACTS
+
+
+@pytest.mark.parametrize("request_text", [
+    "Schedule dentist appointment tomorrow at 3pm",
+    "Add lunch to my calendar on Friday",
+    "Meeting with bob@example.com tomorrow",
+    "Book a call with me tomorrow at 10",
+    "Block 2 hours for focus time tomorrow morning",
+    "Remind me tomorrow at 9am to submit the report",
+])
+def test_no_invitee_is_calendar_only(request_text):
+    assert classify(request_text).path == CALENDAR_ONLY
+
+
+def test_contact_lookup_goes_straight_to_the_tool():
+    route = classify("What's Alice Smith's email?")
+    assert route.path == CONTACTS_LOOKUP
+    assert route.contact_query == "Alice Smith"